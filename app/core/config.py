@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -13,15 +16,104 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     RELOAD: bool = False
+    # worker processes started by python -m app.server, 0 = one per CPU core
+    WORKERS: int = 0
+    # import the app once and fork the workers from it
+    SERVER_PRELOAD: bool = True
+    # auto picks uvloop when installed
+    SERVER_LOOP: Literal["auto", "asyncio", "uvloop"] = "auto"
+    # auto picks httptools when installed
+    SERVER_HTTP: Literal["auto", "h11", "httptools"] = "auto"
+    # connections queued by the listening socket before accept
+    SERVER_BACKLOG: int = 2048
+    # seconds an idle keep-alive connection is held open
+    SERVER_KEEPALIVE: int = 5
+    # requests served before a worker is replaced, 0 = never
+    SERVER_MAX_REQUESTS: int = 0
+    # up to this many extra requests per worker, so they are not replaced together
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    # seconds in-flight requests get to finish on SIGTERM
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
 
     # Security
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    # kid header of issued tokens, change it together with SECRET_KEY
+    JWT_KEY_ID: str = "default"
+    # kid -> secret of rotated-out keys still accepted, e.g. '{"default": "old-secret"}'
+    JWT_PREVIOUS_KEYS: dict[str, str] = {}
+    # verified tokens remembered per worker until they expire
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # check tokens against the Redis revocation list
+    AUTH_REVOCATION_ENABLED: bool = True
+    # revoked tokens the local bloom filter is sized for
+    AUTH_REVOCATION_CAPACITY: int = 100000
+    # seconds before a token revoked by another worker is refused here
+    AUTH_REVOCATION_SYNC_INTERVAL: float = 1.0
+    # work factor; stored hashes with another cost are upgraded on login
+    BCRYPT_ROUNDS: int = 12
+    # bcrypt calls running concurrently
+    PASSWORD_HASH_WORKERS: int = 4
+    # waiting bcrypt calls before requests get a 503
+    PASSWORD_HASH_MAX_QUEUE: int = 256
 
     # Database
     DATABASE_URL: str
     MIGRATION:bool
+    # serve requests from the blocking psycopg2 pool
+    DB_SYNC_FALLBACK: bool = False
+    DB_POOL_MIN_SIZE: int = 3
+    DB_POOL_MAX_SIZE: int = 10
+    # extra connections allowed above max size under load
+    DB_POOL_MAX_OVERFLOW: int = 5
+    # seconds to wait for a free connection
+    DB_POOL_TIMEOUT: float = 10.0
+    # seconds before idle connections above min size are closed
+    DB_POOL_MAX_IDLE: float = 300.0
+    # check connections before handing them out
+    DB_POOL_PRE_PING: bool = True
+    # prepare repeated SQL server-side; turn off behind PgBouncer in transaction mode
+    DB_PREPARED_STATEMENTS: bool = True
+    # runs of the same SQL on a connection before it is prepared, 0 = first use
+    DB_PREPARE_THRESHOLD: int = 0
+    # prepared statements kept per connection, least recently used are deallocated
+    DB_PREPARED_MAX: int = 100
+    # read replicas for read-only sessions, e.g. '["postgresql://...@replica1/db"]'
+    DATABASE_REPLICA_URLS: list[str] = []
+    DB_REPLICA_SELECTION: Literal["round_robin", "least_busy"] = "least_busy"
+    # seconds; replicas further behind are skipped until they catch up
+    DB_REPLICA_MAX_LAG: float = 5.0
+    # seconds between replica health and lag checks
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0
+    # seconds to wait for a replica connection before reading from the primary
+    DB_REPLICA_TIMEOUT: float = 1.0
+    # seconds reads of just written users stay on the primary
+    DB_READ_YOUR_WRITES_WINDOW: float = 5.0
+    # rows fetched per round trip when streaming exports
+    EXPORT_BATCH_SIZE: int = 5000
+    # rows validated, hashed and inserted together by bulk imports
+    IMPORT_BATCH_SIZE: int = 1000
+    # ids accepted by one GET /user/batch
+    USER_BATCH_MAX_IDS: int = 100
+    # identical concurrent user reads share one cache/database call
+    SINGLE_FLIGHT_ENABLED: bool = True
+    # seconds a coalesced read waits before calling on its own
+    SINGLE_FLIGHT_TIMEOUT: float = 5.0
+    # time every statement and keep totals per SQL fingerprint
+    DB_QUERY_STATS: bool = True
+    # fingerprints tracked, the one with the least total time is dropped first
+    DB_QUERY_STATS_MAX: int = 500
+    # statements slower than this are logged
+    DB_SLOW_QUERY_MS: float = 200.0
+    # attach EXPLAIN (ANALYZE, BUFFERS) to slow SELECTs, ignored when APP_ENV=production
+    DB_SLOW_QUERY_EXPLAIN: bool = False
+    # serve /health/queries to signed-in callers
+    HEALTH_QUERIES_ENABLED: bool = False
+
+    # Metrics
+    # seconds between pool gauge updates in each worker
+    METRICS_POOL_INTERVAL: float = 5.0
 
     # CORS 
     CORS_METHOD : list[str] = Field(default=["*"], alias="CORS_METHOD") 
@@ -33,16 +125,95 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "info"
     LOG_FILE: str = "logs/app.log"
     SAVE_LOG: bool
+    # request body kept for logging failed requests
+    LOG_REQUEST_BODY_MAX_BYTES: int = 4096
+    # render and write logs on a background thread
+    LOG_ASYNC: bool = True
+    # records waiting for the writer thread
+    LOG_QUEUE_SIZE: int = 10000
+    # drop (and count) or wait when the queue is full
+    LOG_QUEUE_FULL_POLICY: Literal["drop", "block"] = "drop"
+    # records written per write/flush
+    LOG_BATCH_SIZE: int = 256
+    # fraction of < 400 responses logged, e.g. 0.01
+    LOG_SAMPLE_RATE_SUCCESS: float = 1.0
+    # fraction of >= 400 responses logged
+    LOG_SAMPLE_RATE_ERROR: float = 1.0
+    # per route template or path, e.g. {"/health": 0}; < 400 only
+    LOG_SAMPLE_ROUTE_RATES: dict[str, float] = {}
+    # slower requests are always logged
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+    # identical error lines (status, method, route) logged back to back
+    LOG_ERROR_BURST: int = 20
+    # identical error lines per second after the burst
+    LOG_ERROR_RATE: float = 1.0
 
 
     # Redis
     REDIS_HOST : str
     REDIS_PORT : str
     REDIS_DB  : str
+    # per client and worker
+    REDIS_MAX_CONNECTIONS: int = 50
+    # seconds to wait for a free connection
+    REDIS_POOL_TIMEOUT: float = 1.0
+    # seconds a command may take
+    REDIS_SOCKET_TIMEOUT: float = 0.5
+    REDIS_CONNECT_TIMEOUT: float = 0.5
+    # seconds idle before a connection is pinged on checkout
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # retries of commands whose connection dropped
+    REDIS_RETRIES: int = 2
+    REDIS_RETRY_BACKOFF_BASE: float = 0.01
+    REDIS_RETRY_BACKOFF_CAP: float = 0.2
+    # consecutive failures that open the circuit
+    REDIS_BREAKER_THRESHOLD: int = 5
+    # seconds before a trial call is let through
+    REDIS_BREAKER_RESET_TIMEOUT: float = 5.0
+
+    # Cache
+    # shared Redis tier
+    CACHE_REDIS_ENABLED: bool = True
+    CACHE_L1_ENABLED: bool = True  # in-process tier in front of Redis for single users
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    # upper bound on staleness if an invalidation message is lost
+    CACHE_L1_TTL: float = 5.0
+    # seconds a cached user stays valid
+    CACHE_TTL: int = 300
+    # +/- fraction applied to every TTL
+    CACHE_TTL_JITTER: float = 0.1
+    # seconds a missing user is remembered
+    CACHE_NEGATIVE_TTL: int = 30
+    # seconds a cached user listing stays valid
+    CACHE_LIST_TTL: int = 30
+    # seconds before a loader lock expires
+    CACHE_LOCK_TIMEOUT: float = 5.0
+    # seconds to wait for another worker's load
+    CACHE_LOCK_WAIT: float = 1.0
+    # change when a deploy caches values in a new shape
+    CACHE_NAMESPACE: str = "2"
+    # most-read users loaded into the cache at startup, 0 disables
+    CACHE_WARMUP_SIZE: int = 1000
+    # seconds startup waits for the warm-up
+    CACHE_WARMUP_TIMEOUT: float = 10.0
+    # users whose read counts are tracked
+    CACHE_ACCESS_CAPACITY: int = 10000
+    # seconds after which read counts are halved
+    CACHE_ACCESS_HALF_LIFE: int = 3600
+    # seconds between read count flushes to Redis
+    CACHE_ACCESS_FLUSH_INTERVAL: float = 5.0
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = True
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    The one Settings instance; .env and the environment are read once per
+    process.
+    """
+    return Settings()
+
+settings = get_settings()
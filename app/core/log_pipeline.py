@@ -0,0 +1,173 @@
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+
+class LogPipelineStats:
+    def __init__(self):
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without formatting them.
+
+    Rendering happens on the writer thread. When the queue is full the
+    record is dropped and counted ("drop"), or the caller waits for room
+    ("block").
+    """
+
+    def __init__(
+        self, log_queue: queue.Queue, stats: LogPipelineStats, block: bool = False
+    ):
+        super().__init__(log_queue)
+        self.stats = stats
+        self.block = block
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog passes its event dict as msg; plain logging calls may pass
+        # mutable args, so merge those now while it is still cheap
+        if record.args and not isinstance(record.msg, dict):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.block:
+            self.queue.put(record)
+        else:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.stats.dropped += 1
+                return
+        self.stats.enqueued += 1
+
+
+class BatchingQueueListener:
+    """
+    Background writer for records queued by BoundedQueueHandler.
+
+    Drains up to `batch_size` records at a time and writes each batch to
+    every handler with a single write and flush. Dropped records are
+    reported by a warning line once the queue has room again.
+    """
+
+    _sentinel = None
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        handlers: list[logging.Handler],
+        stats: LogPipelineStats,
+        batch_size: int = 256,
+    ):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.stats = stats
+        self.batch_size = batch_size
+        self._reported_drops = 0
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Write everything already queued, then stop the thread.
+        """
+        if self._thread is None:
+            return
+        self.queue.put(self._sentinel)
+        self._thread.join()
+        self._thread = None
+        for handler in self.handlers:
+            handler.flush()
+
+    def _run(self) -> None:
+        while True:
+            record = self.queue.get()
+            stopping = record is self._sentinel
+            batch = [] if stopping else [record]
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is self._sentinel:
+                    stopping = True
+                else:
+                    batch.append(record)
+            drop_notice = self._drop_notice()
+            if drop_notice is not None:
+                batch.append(drop_notice)
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+
+    def _drop_notice(self) -> logging.LogRecord | None:
+        dropped = self.stats.dropped - self._reported_drops
+        if not dropped:
+            return None
+        self._reported_drops += dropped
+        return logging.LogRecord(
+            "app.logging",
+            logging.WARNING,
+            __file__,
+            0,
+            f"Log queue full, dropped {dropped} log lines",
+            None,
+            None,
+        )
+
+    def _write(self, batch: list[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            if isinstance(handler, logging.StreamHandler):
+                self._write_stream(handler, batch)
+            else:
+                for record in batch:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+        self.stats.written += len(batch)
+        self.stats.batches += 1
+
+    def _write_stream(
+        self, handler: logging.StreamHandler, batch: list[logging.LogRecord]
+    ) -> None:
+        lines = []
+        for record in batch:
+            if record.levelno < handler.level or not handler.filter(record):
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                self.stats.errors += 1
+                handler.handleError(record)
+        if not lines:
+            return
+        data = "".join(lines)
+        with handler.lock:
+            try:
+                # Size based rollover is checked once per batch instead of per record
+                if isinstance(handler, RotatingFileHandler) and handler.maxBytes > 0:
+                    if handler.stream is None:
+                        handler.stream = handler._open()
+                    if handler.stream.tell() + len(data) >= handler.maxBytes:
+                        handler.doRollover()
+                handler.stream.write(data)
+                handler.flush()
+            except Exception:
+                self.stats.errors += 1
+                handler.handleError(batch[-1])
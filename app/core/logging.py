@@ -3,22 +3,36 @@
 import logging
 import logging.config
 import os
+import queue
 import sys
 
 import structlog
 
 from app.core.config import settings
+from app.core.log_pipeline import (
+    BatchingQueueListener,
+    BoundedQueueHandler,
+    LogPipelineStats,
+)
 
 LOG_FILE_PATH = settings.LOG_FILE
 MAX_LOG_SIZE = 10 * 1024 * 1024  # 10 MB
 BACKUP_COUNT = 5
 
+log_stats = LogPipelineStats()
+_listener: BatchingQueueListener | None = None
+
 def setup_logging() -> None:
     """
     Set up unified logging configuration using structlog.
 
     Logs will only be written to LOG_FILE_PATH if settings.SAVE_LOG is True.
+    With LOG_ASYNC, loggers only enqueue records and a background thread
+    renders and writes them in batches (see shutdown_logging).
     """
+    # Reconfiguring replaces the running writer
+    shutdown_logging()
+
     log_level = "DEBUG" if settings.DEBUG else "INFO"
 
     # Define shared processors for structlog
@@ -91,13 +105,55 @@ def setup_logging() -> None:
         }
         active_handlers.append("file")
 
+    # Loggers either write directly or only hand records to the queue
+    log_queue = None
+    if settings.LOG_ASYNC:
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        logging_config["handlers"]["queue"] = {
+            "()": BoundedQueueHandler,
+            "log_queue": log_queue,
+            "stats": log_stats,
+            "block": settings.LOG_QUEUE_FULL_POLICY == "block",
+        }
+    logger_handlers = ["queue"] if settings.LOG_ASYNC else active_handlers
+
     # Apply the active handlers to all configured loggers
     for logger_name in logging_config["loggers"]:
-        logging_config["loggers"][logger_name]["handlers"] = active_handlers
+        logging_config["loggers"][logger_name]["handlers"] = logger_handlers
 
     # Apply the final configuration
     logging.config.dictConfig(logging_config)
 
+    if log_queue is not None:
+        global _listener  # noqa: PLW0603
+        _listener = BatchingQueueListener(
+            log_queue,
+            [logging.getHandlerByName(name) for name in active_handlers],
+            log_stats,
+            batch_size=settings.LOG_BATCH_SIZE,
+        )
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """
+    Write out queued log records and stop the writer thread.
+    """
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> dict:
+    stats = log_stats.as_dict()
+    stats["async"] = _listener is not None
+    if _listener is not None:
+        stats["queued"] = _listener.queue.qsize()
+        stats["max_queue"] = settings.LOG_QUEUE_SIZE
+        stats["full_policy"] = settings.LOG_QUEUE_FULL_POLICY
+    return stats
+
 
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """
@@ -0,0 +1,120 @@
+import os
+import threading
+from bisect import bisect_left
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Upper bounds (ms) of latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """
+    Thread-safe fixed-bucket histogram of latencies in milliseconds.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        index = bisect_left(self.buckets, value_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value_ms
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        labels = [f"le_{bound}" for bound in self.buckets] + ["le_inf"]
+        return {
+            "count": count,
+            "sum_ms": round(total, 3),
+            "avg_ms": round(total / count, 3) if count else 0.0,
+            "buckets": dict(zip(labels, counts, strict=True)),
+        }
+
+
+# ─── Prometheus metrics ───
+# With PROMETHEUS_MULTIPROC_DIR set (an empty directory, before the workers
+# start) every worker writes its samples there and /metrics sums them up.
+
+LATENCY_BUCKETS_S = tuple(bound / 1000 for bound in LATENCY_BUCKETS_MS)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS_S,
+)
+DB_ACQUIRE_DURATION = Histogram(
+    "db_pool_acquire_duration_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=LATENCY_BUCKETS_S,
+)
+DB_SESSION_DURATION = Histogram(
+    "db_session_duration_seconds",
+    "Time a connection was held for queries, commit included",
+    ["pool"],
+    buckets=LATENCY_BUCKETS_S,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Pool connections by state",
+    ["pool", "state"],
+    multiprocess_mode="livesum",
+)
+CACHE_EVENTS = Counter(
+    "cache_events_total", "Cache lookups and maintenance by outcome", ["cache", "event"]
+)
+SINGLE_FLIGHT_EVENTS = Counter(
+    "single_flight_events_total",
+    "Calls of coalesced service functions by outcome",
+    ["name", "event"],
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_seconds",
+    "Time bcrypt jobs waited for a worker",
+    buckets=LATENCY_BUCKETS_S,
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt",
+    ["operation"],
+    buckets=LATENCY_BUCKETS_S,
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "bcrypt jobs refused because the queue was full"
+)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Prometheus text exposition of this process, or of every worker in multiprocess mode.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,199 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Annotated
+
+import redis
+import redis.asyncio
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.redis.redis_instance import ar
+from app.utlis.bloomFilter import BloomFilter
+from app.utlis.generateJwt import verify_jwt_token
+
+logger = get_logger(__name__)
+
+# Revoked jti -> exp, plus a counter bumped on every revocation
+REVOKED_KEY = "auth:revoked"
+REVOKED_VERSION_KEY = "auth:revoked:version"
+BLOOM_ERROR_RATE = 0.001
+
+
+class TokenCache:
+    """
+    Claims of tokens that already passed signature and claim checks, keyed by
+    the SHA-256 of the token and dropped once the token expires.
+
+    A hit skips decoding and HMAC verification; revocation is still checked
+    on every request.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+
+    def get(self, key: bytes) -> dict | None:
+        claims = self._entries.get(key)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims["exp"] <= time.time():
+            # Verified again so the caller gets the usual "expired" error
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def set(self, key: bytes, claims: dict) -> None:
+        self._entries[key] = claims
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats_dict(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class RevocationList:
+    """
+    Revoked token ids, shared through Redis and mirrored in a local bloom filter.
+
+    A jti the filter has never seen is not revoked, which answers almost
+    every request without Redis. Only filter hits (revoked tokens and rare
+    false positives) are confirmed with a Redis lookup. Each worker rebuilds
+    its filter when the revocation counter in Redis moves, so revocations
+    made in other workers apply within one sync interval. Until the first
+    sync succeeds the filter knows nothing, so every check goes to Redis.
+    Expired entries are pruned by revoke(), so syncing only reads.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis | None,
+        capacity: int = 100000,
+        enabled: bool = True,
+    ):
+        self.client = client
+        self.capacity = capacity
+        self.enabled = enabled and client is not None
+        self.redis_checks = 0
+        self._bloom = BloomFilter(capacity, BLOOM_ERROR_RATE)
+        self._version: bytes | None = None
+        self._sync_failed = False
+        self._synced = False
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        if not self.enabled:
+            raise RuntimeError("Token revocation is disabled")
+        pipe = self.client.pipeline()
+        # Expired tokens are rejected anyway, stop carrying them
+        pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+        pipe.zadd(REVOKED_KEY, {jti: exp})
+        pipe.incr(REVOKED_VERSION_KEY)
+        await pipe.execute()
+        self._bloom.add(jti)
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        if not self.enabled or jti is None:
+            return False
+        if self._synced and jti not in self._bloom:
+            return False
+        self.redis_checks += 1
+        try:
+            return await self.client.zscore(REVOKED_KEY, jti) is not None
+        except redis.RedisError as e:
+            # Cannot tell, refuse rather than let a revoked token through
+            logger.error("Revocation check failed", error=str(e))
+            return True
+
+    async def sync(self) -> None:
+        if not self.enabled:
+            return
+        try:
+            version = await self.client.get(REVOKED_VERSION_KEY)
+            if self._synced and version == self._version:
+                return
+            revoked = await self.client.zrangebyscore(REVOKED_KEY, time.time(), "+inf")
+        except redis.RedisError as e:
+            if not self._sync_failed:
+                logger.warning(
+                    "Revocation list sync failed, keeping the current filter",
+                    error=str(e),
+                )
+            self._sync_failed = True
+            return
+        self._sync_failed = False
+        bloom = BloomFilter(max(self.capacity, len(revoked) * 2), BLOOM_ERROR_RATE)
+        for jti in revoked:
+            bloom.add(jti.decode())
+        self._bloom, self._version, self._synced = bloom, version, True
+
+    async def run_sync(self, interval: float) -> None:
+        if not self.enabled:
+            return
+        while True:
+            await self.sync()
+            await asyncio.sleep(interval)
+
+    def stats_dict(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "synced": self._synced,
+            "revoked": self._bloom.count,
+            "filter_bits": self._bloom.size,
+            "redis_checks": self.redis_checks,
+        }
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+revocations = RevocationList(
+    ar,
+    capacity=settings.AUTH_REVOCATION_CAPACITY,
+    enabled=settings.AUTH_REVOCATION_ENABLED,
+)
+
+bearer = HTTPBearer(auto_error=False)
+
+
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)],
+) -> dict:
+    """
+    Claims of the bearer token sent with the request; 401 when it is
+    missing, invalid, expired or revoked.
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    token = credentials.credentials
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = verify_jwt_token(token)
+        token_cache.set(key, claims)
+    if await revocations.is_revoked(claims.get("jti")):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    return claims
+
+
+def auth_stats() -> dict:
+    return {
+        "token_cache": token_cache.stats_dict(),
+        "revocations": revocations.stats_dict(),
+    }
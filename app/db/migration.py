@@ -1,42 +1,30 @@
-import logging
-import subprocess
+from pathlib import Path
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.core.logging import get_logger
 
+logger = get_logger(__name__)
 
-def migration():
-    try:
-        logging.info("Starting database migration...")
-        with get_db() as db:
-            # Optional: check DB connection first
-            try:
-                db.execute("SELECT 1")  # Connection check
-                logging.info(" DB connection successful.")
-            except Exception as conn_err:
-                logging.error(f" Failed to connect to DB: {conn_err}")
-                return
-
-            logging.info("Running Alembic migration via subprocess...")
-
-            subprocess.run(
-                ["alembic", "upgrade", "head"],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            logging.info(" Migration SQL executed successfully.")
-
-    except subprocess.CalledProcessError as e:
-         logging.error(" Alembic migration failed.")
-         logging.error("STDOUT:", e.stdout)
-         logging.error("STDERR:", e.stderr)
-
-            # Execute the SQL script
-    except Exception as e:
-        logging.error(f" An error occurred during migration: {e}")
-    finally:
-        logging.info(" Database migration process complete.")
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
 
 
+def migration():
+    # Alembic and SQLAlchemy are only imported when migrations actually run
+    from alembic import command  # noqa: PLC0415
+    from alembic.config import Config  # noqa: PLC0415
 
+    try:
+        logger.info("Starting database migration...")
+        config = Config(str(ALEMBIC_INI))
+        config.attributes["database_url"] = settings.DATABASE_URL
+        # Keep the app's logging configuration
+        config.attributes["configure_logger"] = False
+
+        logger.info("Running Alembic migration in-process...")
+        command.upgrade(config, "head")
+        logger.info("Migration SQL executed successfully.")
 
+    except Exception as e:
+        logger.error("An error occurred during migration", error=str(e))
+    finally:
+        logger.info("Database migration process complete.")
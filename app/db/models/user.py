@@ -1,6 +1,7 @@
 
 import sqlalchemy as sa
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Computed, Index, Integer, String
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 from app.db.models.base import Base
 
@@ -15,3 +16,19 @@ class User(Base):
     last_name = Column(String, nullable=False)
     full_name = Column(String, nullable=True)
     isactive = Column(Boolean, default=True, server_default=sa.true())
+    # Full-text search over names and email, see user_service.list_users
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(first_name, '') || ' ' "
+            "|| coalesce(last_name, '') || ' ' || coalesce(full_name, '') || ' ' "
+            "|| email || ' ' || translate(email, '@.', '  '))",
+            persisted=True,
+        ),
+    )
+
+    __table_args__ = (
+        # Keyset pagination over (first_name, user_id)
+        Index("ix_users_first_name_user_id", "first_name", "user_id"),
+        Index("ix_users_search_vector", "search_vector", postgresql_using="gin"),
+    )
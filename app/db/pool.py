@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import deque
+from contextlib import suppress
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg_pool import PoolTimeout
+
+from app.core.metrics import LatencyHistogram
+
+
+class BoundedConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    Nothing is opened on construction. Once open() has run, keeps between
+    `min_size` and `max_size` connections open and may create up
+    to `max_overflow` extra ones under load, which are closed as soon as they
+    are returned. When every connection is checked out, callers wait up to
+    `timeout` seconds for one to be returned before PoolTimeout is raised.
+    Connections idle for longer than `max_idle` seconds are closed down to
+    `min_size`, and each connection is checked before it is handed out.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        min_size: int = 3,
+        max_size: int = 10,
+        max_overflow: int = 0,
+        timeout: float = 30.0,
+        max_idle: float = 600.0,
+        pre_ping: bool = True,
+    ):
+        if min_size > max_size:
+            raise ValueError("min_size must not exceed max_size")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.pre_ping = pre_ping
+
+        self._idle: deque[tuple[extensions.connection, float]] = deque()
+        self._size = 0
+        self._waiting = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._cond = threading.Condition()
+        self.acquire_latency = LatencyHistogram()
+
+    def open(self) -> None:
+        """
+        Open connections up to `min_size`. Until then, or without calling it,
+        connections are opened on first use.
+        """
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            conn = self._open_reserved()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def _open_reserved(self) -> extensions.connection:
+        # The caller already counted this connection in _size
+        try:
+            return psycopg2.connect(self.dsn)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _discard(self, conn: extensions.connection) -> None:
+        self._size -= 1
+        self._discarded += 1
+        if not conn.closed:
+            with suppress(psycopg2.Error):
+                conn.close()
+
+    def _is_usable(self, conn: extensions.connection) -> bool:
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _recycle_idle(self, now: float) -> None:
+        # Oldest returned connections sit on the left of the deque
+        while self._idle and self._size > self.min_size:
+            conn, returned_at = self._idle[0]
+            if now - returned_at < self.max_idle:
+                break
+            self._idle.popleft()
+            self._discard(conn)
+
+    def getconn(self, timeout: float | None = None) -> extensions.connection:
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        with self._cond:
+            while True:
+                self._recycle_idle(time.monotonic())
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size + self.max_overflow:
+                    # Reserve the slot, the connection itself is opened below
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"couldn't get a connection after {timeout:.2f} sec"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        # Network I/O happens outside the lock
+        if conn is None:
+            conn = self._open_reserved()
+        elif not self._is_usable(conn):
+            with self._cond:
+                self._discard(conn)
+                self._size += 1
+            conn = self._open_reserved()
+
+        self.acquire_latency.observe((time.monotonic() - start) * 1000)
+        return conn
+
+    def putconn(self, conn: extensions.connection, close: bool = False) -> None:
+        if not close and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+
+        with self._cond:
+            # Overflow connections are kept while someone is waiting for one
+            if (
+                close
+                or conn.closed
+                or (self._size > self.max_size and not self._waiting)
+            ):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self) -> None:
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            stats = {
+                "pool_min": self.min_size,
+                "pool_max": self.max_size,
+                "max_overflow": self.max_overflow,
+                "pool_size": self._size,
+                "pool_available": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "overflow": max(0, self._size - self.max_size),
+                "requests_waiting": self._waiting,
+                "timeouts": self._timeouts,
+                "connections_discarded": self._discarded,
+            }
+        stats["acquire_ms"] = self.acquire_latency.snapshot()
+        return stats
@@ -1,65 +1,431 @@
-from app.core.config import Settings
-from app.db.session import get_db
+import itertools
+import re
+from collections.abc import AsyncIterator, Iterable, Sequence
+from contextlib import aclosing
+from functools import lru_cache
+from typing import Any
+
+from app.db.rows import to_records
+from app.db.session import get_async_db, stream_rows
+
+OPERATORS = frozenset({
+    "=", "!=", "<>", "<", "<=", ">", ">=",
+    "LIKE", "ILIKE", "IN", "NOT IN", "IS", "IS NOT",
+})
+JOIN_KINDS = frozenset({"INNER", "LEFT", "RIGHT", "FULL"})
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+
+class Raw:
+    """
+    Trusted SQL fragment with positional %s placeholders, e.g.
+    Raw("ts_rank(search_vector, to_tsquery('simple', %s))", tsquery).
+
+    Identifiers inside are used as written; values always go in params.
+    """
+
+    def __init__(self, sql: str, *params: Any):
+        self.sql = sql
+        self.params = params
+
+
+@lru_cache(maxsize=1024)
+def quote(identifier: str) -> str:
+    """
+    Quote a column or table name, e.g. "users.email" -> '"users"."email"'.
+    """
+    return ".".join(
+        part if part == "*" else '"' + part.replace('"', '""') + '"'
+        for part in identifier.split(".")
+    )
+
+
+def _expression(column: "str | Raw") -> tuple[str, tuple]:
+    if isinstance(column, Raw):
+        return column.sql, column.params
+    return quote(column), ()
+
+
+def _split(fragments: Iterable[tuple[str, tuple]]) -> tuple[tuple[str, ...], tuple]:
+    # (sql, params) pairs -> the SQL texts and every param in order
+    fragments = tuple(fragments)
+    if not fragments:
+        return (), ()
+    sqls, params = zip(*fragments, strict=True)
+    return sqls, tuple(itertools.chain.from_iterable(params))
+
+
+def _statement(shape: tuple) -> list[str]:
+    (kind, table, columns, joins, conditions, orders,
+     limit, offset, rows, conflict, returns) = shape
+    if kind == "insert":
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        values = ", ".join([row] * rows)
+        parts = [f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values}"]
+        if conflict:
+            parts.append(conflict)
+    else:
+        if kind == "select":
+            parts = [f"SELECT {', '.join(columns)} FROM {table}", *joins]
+        elif kind == "update":
+            assignments = ", ".join(f"{column} = %s" for column in columns)
+            parts = [f"UPDATE {table} SET {assignments}"]
+        else:
+            parts = [f"DELETE FROM {table}"]
+        if conditions:
+            parts.append("WHERE " + " AND ".join(conditions))
+        if orders:
+            parts.append("ORDER BY " + ", ".join(orders))
+        if limit:
+            parts.append("LIMIT %s")
+        if offset:
+            parts.append("OFFSET %s")
+    if returns:
+        parts.append("RETURNING " + ", ".join(returns))
+    return parts
+
+
+@lru_cache(maxsize=512)
+def _compile(shape: tuple) -> str:
+    # Same shape, same SQL text: the server-side prepared statement is reused too
+    names = itertools.count()
+    return _PLACEHOLDER.sub(
+        lambda match: "%%" if match.group() == "%%" else f"%(p{next(names)})s",
+        " ".join(_statement(shape)),
+    )
+
+
+def compile_cache_stats() -> dict:
+    return _compile.cache_info()._asdict()
 
-settings = Settings()
 
 class QueryBuilder:
-    def __init__(self, table):
-        self.table = table
-        self.query = ""
-        self.params = {}
-    
-    def reset(self):
-        self.query = ""
-        self.params = {}
-    
-    def execute(self):
-        with get_db() as cursor:
-            cursor.execute(self.query, self.params)
-            if self.query.strip().upper().startswith("SELECT"):
-                return cursor.fetchall()
-        self.reset()
-    
+    """
+    Immutable SQL builder; every method returns a new builder.
+
+    Identifiers are quoted and every value is sent as a named parameter.
+    The SQL text only depends on the query shape (clauses, columns,
+    operators, number of inserted rows), so it is compiled once per shape
+    and cached. IN lists compile to = ANY(...) and keep a single shape
+    whatever their length::
+
+        users = await (
+            QueryBuilder("users")
+            .select("user_id", "email")
+            .where("isactive", True)
+            .where("user_id", "IN", [1, 2, 3])
+            .order_by("user_id")
+            .limit(10)
+            .fetch_all()
+        )
+    """
+
+    def __init__(self, table: str):
+        object.__setattr__(self, "__dict__", {
+            "table": table,
+            "kind": "select",
+            "selected": ("*",),
+            "selected_params": (),
+            "columns": (),
+            "joins": (),
+            "join_params": (),
+            "conditions": (),
+            "condition_params": (),
+            "orders": (),
+            "order_params": (),
+            "limit_value": None,
+            "offset_value": None,
+            "rows": (),
+            "conflict": None,
+            "returns": (),
+            "_compiled": None,
+        })
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QueryBuilder is immutable")
+
+    def _with(self, **changes) -> "QueryBuilder":
+        query = object.__new__(QueryBuilder)
+        state = {**self.__dict__, **changes, "_compiled": None}
+        object.__setattr__(query, "__dict__", state)
+        return query
+
     # SELECT Query
-    def select(self, *columns):
-        self.query = f"SELECT {', '.join(columns) if columns else '*'} FROM {self.table}"
-        return self
-    
+    def select(self, *columns: "str | Raw") -> "QueryBuilder":
+        columns = columns or ("*",)
+        if any(isinstance(column, Raw) for column in columns):
+            selected, params = _split(map(_expression, columns))
+        else:
+            selected, params = tuple(map(quote, columns)), ()
+        return self._with(kind="select", selected=selected, selected_params=params)
+
     # WHERE Clause
-    def where(self, **conditions):
-        if "WHERE" not in self.query:
-            self.query += " WHERE"
+    def where(self, *condition: Any, **equals: Any) -> "QueryBuilder":
+        """
+        Add conditions joined with AND: where(Raw(...)), where(column, value),
+        where(column, operator, value) or where(column=value, ...).
+        A None value with = or != becomes IS NULL / IS NOT NULL, and IS /
+        IS NOT with a value compare with IS [NOT] DISTINCT FROM.
+        """
+        conditions = []
+        if condition:
+            if len(condition) == 1 and isinstance(condition[0], Raw):
+                conditions.append((condition[0].sql, condition[0].params))
+            elif len(condition) == 2:
+                conditions.append(self._condition(condition[0], "=", condition[1]))
+            elif len(condition) == 3:
+                conditions.append(self._condition(*condition))
+            else:
+                raise TypeError(
+                    "where() takes Raw, (column, value) or (column, operator, value)"
+                )
+        conditions.extend(
+            self._condition(column, "=", value) for column, value in equals.items()
+        )
+        sqls, params = _split(conditions)
+        return self._with(
+            conditions=self.conditions + sqls,
+            condition_params=self.condition_params + params,
+        )
+
+    @staticmethod
+    def _condition(column: "str | Raw", operator: str, value: Any) -> tuple[str, tuple]:
+        operator = operator.upper()
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+        expression, params = _expression(column)
+        if value is None and operator in ("=", "IS"):
+            return f"{expression} IS NULL", params
+        if value is None and operator in ("!=", "<>", "IS NOT"):
+            return f"{expression} IS NOT NULL", params
+        if operator == "IN":
+            return f"{expression} = ANY(%s)", (*params, list(value))
+        if operator == "NOT IN":
+            return f"{expression} <> ALL(%s)", (*params, list(value))
+        if operator in ("IS", "IS NOT"):
+            # IS cannot take a parameter, only NULL / TRUE / FALSE literals
+            negated = "" if operator == "IS NOT" else "NOT "
+            operator = f"IS {negated}DISTINCT FROM"
+        return f"{expression} {operator} %s", (*params, value)
+
+    # Keyset Pagination
+    def keyset(
+        self,
+        columns: Sequence[str],
+        after: Sequence[Any] | None = None,
+        descending: bool = False,
+    ) -> "QueryBuilder":
+        """
+        Order by `columns` and, given the last row of the previous page,
+        continue after it with a row comparison the index can answer.
+        """
+        query = self.order_by(*columns, descending=descending)
+        if after is None:
+            return query
+        names = ", ".join(quote(column) for column in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        comparison = "<" if descending else ">"
+        return query.where(Raw(f"({names}) {comparison} ({placeholders})", *after))
+
+    # ORDER BY Clause
+    def order_by(
+        self, *columns: "str | Raw", descending: bool = False
+    ) -> "QueryBuilder":
+        direction = "DESC" if descending else "ASC"
+        sqls, params = _split(map(_expression, columns))
+        return self._with(
+            orders=self.orders + tuple(f"{sql} {direction}" for sql in sqls),
+            order_params=self.order_params + params,
+        )
+
+    def limit(self, limit: int | None) -> "QueryBuilder":
+        return self._with(limit_value=limit)
+
+    def offset(self, offset: int | None) -> "QueryBuilder":
+        return self._with(offset_value=offset)
+
+    # JOIN Operation
+    def join(
+        self, table: str, on: "tuple[str, str] | Raw", kind: str = "INNER"
+    ) -> "QueryBuilder":
+        kind = kind.upper()
+        if kind not in JOIN_KINDS:
+            raise ValueError(f"Unsupported join: {kind}")
+        if isinstance(on, Raw):
+            condition, params = on.sql, on.params
         else:
-            self.query += " AND"
-        for i, (key, value) in enumerate(conditions.items()):
-            param_name = f"param_{len(self.params)}"
-            self.query += f" {key} = %{param_name}"
-            self.params[param_name] = value
-            if i < len(conditions) - 1:
-                self.query += " AND"
-        return self
+            condition, params = f"{quote(on[0])} = {quote(on[1])}", ()
+        return self._with(
+            joins=(*self.joins, f"{kind} JOIN {quote(table)} ON {condition}"),
+            join_params=self.join_params + tuple(params),
+        )
 
     # INSERT Query
-    def insert(self, **values):
-        columns = ", ".join(values.keys())
-        placeholders = ", ".join([f"%{key}" for key in values])
-        self.query = f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})"
-        self.params = values
-        return self
-    
+    def insert(self, **values: Any) -> "QueryBuilder":
+        return self.insert_many(tuple(values), [tuple(values.values())])
+
+    def insert_many(
+        self, columns: Sequence[str], rows: Iterable[Sequence[Any]]
+    ) -> "QueryBuilder":
+        columns = tuple(map(quote, columns))
+        rows = tuple(tuple(row) for row in rows)
+        return self._with(kind="insert", columns=columns, rows=rows)
+
+    def on_conflict_do_nothing(self, *columns: str) -> "QueryBuilder":
+        target = ", ".join(quote(column) for column in columns)
+        target = f" ({target})" if columns else ""
+        return self._with(conflict=f"ON CONFLICT{target} DO NOTHING")
+
     # UPDATE Query
-    def update(self, **values):
-        set_clause = ", ".join([f"{key} = %{key}" for key in values])
-        self.query = f"UPDATE {self.table} SET {set_clause}"
-        self.params = values
-        return self
-    
+    def update(self, **values: Any) -> "QueryBuilder":
+        rows = (tuple(values.values()),)
+        return self._with(kind="update", columns=tuple(map(quote, values)), rows=rows)
+
     # DELETE Query
-    def delete(self):
-        self.query = f"DELETE FROM {self.table}"
-        return self
+    def delete(self) -> "QueryBuilder":
+        return self._with(kind="delete")
 
-    # JOIN Operation
-    def join(self, table, condition):
-        self.query += f" JOIN {table} ON {condition}"
-        return self
+    def returning(self, *columns: str) -> "QueryBuilder":
+        return self._with(returns=tuple(map(quote, columns)))
+
+    def _shape(self) -> tuple:
+        """
+        Everything the SQL text depends on; values are left out.
+        """
+        select = self.kind == "select"
+        return (
+            self.kind,
+            quote(self.table),
+            self.selected if select else self.columns,
+            self.joins if select else (),
+            self.conditions,
+            self.orders if select else (),
+            select and self.limit_value is not None,
+            select and self.offset_value is not None,
+            len(self.rows),
+            self.conflict if self.kind == "insert" else None,
+            self.returns,
+        )
+
+    def _values(self) -> tuple:
+        # Same order as the placeholders in _statement()
+        if self.kind == "insert":
+            return tuple(value for row in self.rows for value in row)
+        if self.kind == "update":
+            return self.rows[0] + self.condition_params
+        if self.kind == "delete":
+            return self.condition_params
+        pages = (self.limit_value, self.offset_value)
+        return (
+            self.selected_params
+            + self.join_params
+            + self.condition_params
+            + self.order_params
+            + tuple(value for value in pages if value is not None)
+        )
+
+    def compile(self) -> tuple[str, dict[str, Any]]:
+        """
+        SQL text with %(pN)s placeholders and the matching params.
+        """
+        if self._compiled is None:
+            if self.kind == "insert" and not self.rows:
+                raise ValueError("insert needs at least one row")
+            if self.kind in ("update", "delete") and not self.conditions:
+                raise ValueError(f"{self.kind} without where() would touch every row")
+            sql = _compile(self._shape())
+            params = {f"p{index}": value for index, value in enumerate(self._values())}
+            self.__dict__["_compiled"] = (sql, params)
+        return self._compiled
+
+    @property
+    def sql(self) -> str:
+        return self.compile()[0]
+
+    @property
+    def params(self) -> dict[str, Any]:
+        return self.compile()[1]
+
+    async def _run(
+        self,
+        fetch,
+        cursor,
+        read_only: bool,
+        sticky: str | None,
+        tuple_rows: bool = False,
+    ):
+        sql, params = self.compile()
+        if cursor is not None:
+            await cursor.execute(sql, params)
+            return await fetch(cursor)
+        async with get_async_db(
+            read_only=read_only, sticky=sticky, tuple_rows=tuple_rows
+        ) as session:
+            await session.execute(sql, params)
+            return await fetch(session)
+
+    async def fetch_all(
+        self, cursor=None, read_only: bool = False, sticky: str | None = None
+    ) -> list[dict]:
+        """
+        Run the query and return every row. Opens its own session unless a
+        cursor is given; read_only / sticky are passed to get_async_db().
+        """
+        return await self._run(
+            lambda cursor: cursor.fetchall(), cursor, read_only, sticky
+        )
+
+    async def fetch_one(
+        self, cursor=None, read_only: bool = False, sticky: str | None = None
+    ) -> dict | None:
+        return await self._run(
+            lambda cursor: cursor.fetchone(), cursor, read_only, sticky
+        )
+
+    async def fetch_records(
+        self, cursor=None, read_only: bool = False, sticky: str | None = None
+    ) -> list:
+        """
+        Like fetch_all() but rows come back as lightweight records (see
+        app.db.rows) decoded from tuples. A given cursor must return tuples.
+        """
+        async def records(cursor) -> list:
+            return to_records(cursor.description, await cursor.fetchall())
+
+        return await self._run(records, cursor, read_only, sticky, tuple_rows=True)
+
+    async def fetch_record(
+        self, cursor=None, read_only: bool = False, sticky: str | None = None
+    ):
+        async def record(cursor):
+            row = await cursor.fetchone()
+            return None if row is None else to_records(cursor.description, (row,))[0]
+
+        return await self._run(record, cursor, read_only, sticky, tuple_rows=True)
+
+    async def execute(self, cursor=None) -> int:
+        """
+        Run the query and return the number of affected rows.
+        """
+        async def rowcount(cursor) -> int:
+            return cursor.rowcount
+
+        return await self._run(rowcount, cursor, False, None)
+
+    def stream(self, batch_size: int = 1000) -> AsyncIterator[list[dict]]:
+        """
+        Yield the rows in lists of up to `batch_size` through a server-side
+        cursor; see stream_rows() for how the connection is held.
+        """
+        sql, params = self.compile()
+        return stream_rows(sql, params, batch_size)
+
+    async def iterate(self, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """
+        Yield rows one at a time, fetched `batch_size` at a time.
+        """
+        async with aclosing(self.stream(batch_size)) as batches:
+            async for rows in batches:
+                for row in rows:
+                    yield row
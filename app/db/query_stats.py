@@ -0,0 +1,283 @@
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utlis.routeTemplate import route_template
+
+logger = get_logger(__name__)
+
+# ASGI scope of the request being served, set by MetricsMiddleware
+request_scope: ContextVar[dict | None] = ContextVar("request_scope", default=None)
+
+# Seconds before a slow statement gets explained again
+EXPLAIN_INTERVAL = 60.0
+# Calling routes remembered per statement
+MAX_ROUTES = 10
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_VALUE = re.compile(r"'(?:[^']|'')*'|%\(\w+\)s|%s|\$\d+|(?<![\w.])\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.I)
+_VALUE_ROWS = re.compile(
+    r"\b(VALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+",
+    re.I,
+)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """
+    Normalise a statement so calls differing only in values group together.
+
+    Literals and placeholders become "?", IN lists "IN (?, ...)" and
+    multi-row VALUES keep their first row, e.g.
+    "SELECT * FROM users WHERE user_id = %s;" becomes
+    "SELECT * FROM users WHERE user_id = ?".
+    """
+    query = _COMMENT.sub(" ", query)
+    query = _VALUE.sub("?", query)
+    query = _IN_LIST.sub("IN (?, ...)", query)
+    query = _VALUE_ROWS.sub(r"\1, ...", query)
+    return _SPACE.sub(" ", query).strip().rstrip(";").rstrip()
+
+
+def current_route() -> str | None:
+    scope = request_scope.get()
+    if scope is None:
+        return None
+    return route_template(scope, scope["path"])
+
+
+class StatementStats:
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.routes: dict[str, int] = {}
+        self.plan: str | None = None
+        self.explained_at = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> dict:
+        stats = dict(vars(self))
+        del stats["explained_at"]
+        stats["total_ms"] = round(self.total_ms, 3)
+        stats["mean_ms"] = round(self.mean_ms, 3)
+        stats["max_ms"] = round(self.max_ms, 3)
+        stats["routes"] = dict(self.routes)
+        return stats
+
+
+class QueryStats:
+    """
+    Per-fingerprint totals of every statement run through the session layer.
+
+    At most `max_statements` fingerprints are kept; when a new one arrives
+    the statement with the least total time is dropped.
+    """
+
+    def __init__(
+        self, max_statements: int = 500, slow_ms: float = 200.0, explain: bool = False
+    ):
+        self.max_statements = max_statements
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self._statements: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "QueryStats":
+        return cls(
+            max_statements=settings.DB_QUERY_STATS_MAX,
+            slow_ms=settings.DB_SLOW_QUERY_MS,
+            # EXPLAIN ANALYZE runs the statement a second time, never in production
+            explain=settings.DB_SLOW_QUERY_EXPLAIN and settings.APP_ENV != "production",
+        )
+
+    def record(
+        self, query: str, duration_ms: float, rows: int, route: str | None
+    ) -> StatementStats:
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= self.max_statements:
+                    cheapest = min(self._statements.values(), key=lambda s: s.total_ms)
+                    del self._statements[cheapest.fingerprint]
+                stats = self._statements[key] = StatementStats(key)
+            stats.calls += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.rows += max(rows, 0)
+            if duration_ms >= self.slow_ms:
+                stats.slow += 1
+            if route is not None and (
+                route in stats.routes or len(stats.routes) < MAX_ROUTES
+            ):
+                stats.routes[route] = stats.routes.get(route, 0) + 1
+        return stats
+
+    def wants_plan(self, query: str, stats: StatementStats) -> bool:
+        """
+        Whether a slow statement should be explained now. Only SELECTs are,
+        at most once per EXPLAIN_INTERVAL per fingerprint.
+        """
+        if not self.explain or not query.lstrip().upper().startswith("SELECT"):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - stats.explained_at < EXPLAIN_INTERVAL:
+                return False
+            stats.explained_at = now
+        return True
+
+    def log_slow(
+        self,
+        stats: StatementStats,
+        duration_ms: float,
+        rows: int,
+        route: str | None,
+        plan: str | None = None,
+    ) -> None:
+        extra = {
+            "fingerprint": stats.fingerprint,
+            "duration_ms": round(duration_ms, 2),
+            "rows": rows,
+            "route": route,
+        }
+        if plan is not None:
+            extra["plan"] = plan
+        logger.warning("Slow query", extra=extra)
+
+    def top(self, limit: int = 20, order: str = "total_ms") -> list[dict]:
+        with self._lock:
+            statements = sorted(
+                self._statements.values(), key=lambda s: getattr(s, order), reverse=True
+            )
+            return [stats.as_dict() for stats in statements[:limit]]
+
+    def snapshot(self, limit: int = 20, order: str = "total_ms") -> dict:
+        return {
+            "slow_ms": self.slow_ms,
+            "explain": self.explain,
+            "tracked": len(self._statements),
+            "statements": self.top(limit, order),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+
+query_stats = QueryStats.from_settings()
+
+
+class InstrumentedCursor:
+    """
+    Async cursor wrapper timing every execute into query_stats.
+
+    Slow statements are logged with their fingerprint, row count and route;
+    when explaining is enabled, slow SELECTs are re-run once under
+    EXPLAIN (ANALYZE, BUFFERS) on a fresh cursor from `new_cursor` inside a
+    savepoint, so the caller's results and transaction are left alone.
+    """
+
+    def __init__(self, cursor, new_cursor=None, stats: QueryStats = query_stats):
+        self._cursor = cursor
+        self._new_cursor = new_cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def execute(self, query, params=None):
+        start = time.perf_counter_ns()
+        await self._cursor.execute(query, params)
+        await self._observe(query, params, (time.perf_counter_ns() - start) / 1_000_000)
+        return self
+
+    async def executemany(self, query, params_seq):
+        start = time.perf_counter_ns()
+        await self._cursor.executemany(query, params_seq)
+        await self._observe(
+            query, None, (time.perf_counter_ns() - start) / 1_000_000, explain=False
+        )
+
+    async def _observe(
+        self, query, params, duration_ms: float, explain: bool = True
+    ) -> None:
+        route = current_route()
+        rows = self._cursor.rowcount
+        stats = self._stats.record(query, duration_ms, rows, route)
+        if duration_ms < self._stats.slow_ms:
+            return
+        plan = None
+        if (
+            explain
+            and self._new_cursor is not None
+            and self._stats.wants_plan(query, stats)
+        ):
+            plan = stats.plan = await self._explain(query, params)
+        self._stats.log_slow(stats, duration_ms, rows, route, plan)
+
+    async def _explain(self, query, params) -> str | None:
+        cursor = self._new_cursor()
+        try:
+            await cursor.execute("SAVEPOINT query_explain")
+            try:
+                await cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+                plan = "\n".join(row["QUERY PLAN"] for row in await cursor.fetchall())
+            except Exception as error:
+                await cursor.execute("ROLLBACK TO SAVEPOINT query_explain")
+                return f"EXPLAIN failed: {error}"
+            await cursor.execute("RELEASE SAVEPOINT query_explain")
+            return plan
+        except Exception as error:
+            logger.warning("Could not explain slow query", extra={"error": str(error)})
+            return None
+        finally:
+            await cursor.close()
+
+
+class SyncInstrumentedCursor:
+    """
+    Blocking counterpart of InstrumentedCursor for get_db(); records and logs
+    but never explains.
+    """
+
+    def __init__(self, cursor, stats: QueryStats = query_stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, query, params=None):
+        start = time.perf_counter_ns()
+        self._cursor.execute(query, params)
+        self._observe(query, (time.perf_counter_ns() - start) / 1_000_000)
+
+    def executemany(self, query, params_seq):
+        start = time.perf_counter_ns()
+        self._cursor.executemany(query, params_seq)
+        self._observe(query, (time.perf_counter_ns() - start) / 1_000_000)
+
+    def _observe(self, query, duration_ms: float) -> None:
+        route = current_route()
+        rows = self._cursor.rowcount
+        stats = self._stats.record(query, duration_ms, rows, route)
+        if duration_ms >= self._stats.slow_ms:
+            self._stats.log_slow(stats, duration_ms, rows, route)
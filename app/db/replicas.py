@@ -0,0 +1,199 @@
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+
+import redis
+import redis.asyncio
+from psycopg.conninfo import conninfo_to_dict
+from psycopg_pool import AsyncConnectionPool
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds of WAL the server has received but not replayed yet. 0 on a
+# primary, or on a replica that has replayed everything it received.
+LAG_QUERY = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery()
+        OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END AS lag
+"""
+
+
+class Replica:
+    def __init__(self, name: str, pool: AsyncConnectionPool):
+        self.name = name
+        self.pool = pool
+        self.host = conninfo_to_dict(pool.conninfo).get("host")
+        # Not used until the first health check passes
+        self.healthy = False
+        self.lag: float | None = None
+        self.in_use = 0
+        self.last_error: str | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "lag_s": None if self.lag is None else round(self.lag, 3),
+            "in_use": self.in_use,
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks the replica that serves a read-only session.
+
+    Replicas are checked every few seconds; unreachable ones and ones
+    lagging more than `max_lag` seconds are skipped until a later check
+    passes. "round_robin" rotates through the usable replicas,
+    "least_busy" takes the one with the fewest connections checked out.
+    None means the read goes to the primary.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Replica],
+        selection: str = "least_busy",
+        max_lag: float = 5.0,
+        check_timeout: float = 1.0,
+    ):
+        self.replicas = replicas
+        self.selection = selection
+        self.max_lag = max_lag
+        self.check_timeout = check_timeout
+        self._turn = itertools.count()
+
+    def choose(self) -> Replica | None:
+        usable = [replica for replica in self.replicas if replica.healthy]
+        if not usable:
+            return None
+        # Rotating the start also spreads ties between equally busy replicas
+        start = next(self._turn) % len(usable)
+        usable = usable[start:] + usable[:start]
+        if self.selection == "round_robin":
+            return usable[0]
+        return min(usable, key=lambda replica: replica.in_use)
+
+    def mark_failed(self, replica: Replica, error: Exception) -> None:
+        if replica.healthy:
+            logger.warning(
+                "Replica unavailable, reading from the primary",
+                replica=replica.name,
+                error=str(error),
+            )
+        replica.healthy = False
+        replica.last_error = str(error)
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.pool.connection(timeout=self.check_timeout) as conn:
+                lag = (await (await conn.execute(LAG_QUERY)).fetchone())["lag"]
+        except Exception as error:
+            self.mark_failed(replica, error)
+            return
+        replica.lag = float(lag)
+        if replica.lag > self.max_lag:
+            self.mark_failed(
+                replica,
+                Exception(f"replication lag {replica.lag:.1f}s over {self.max_lag}s"),
+            )
+            return
+        if not replica.healthy:
+            logger.info(
+                "Replica available", replica=replica.name, lag_s=round(replica.lag, 3)
+            )
+        replica.healthy = True
+        replica.last_error = None
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def open(self) -> None:
+        # Not waiting: a replica that is down must not block startup
+        for replica in self.replicas:
+            await replica.pool.open(wait=False)
+        await self.check_all()
+
+    async def close(self) -> None:
+        for replica in self.replicas:
+            await replica.pool.close()
+
+    async def run_checks(self, interval: float) -> None:
+        if not self.replicas:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_all()
+
+    def stats_dict(self) -> dict:
+        return {
+            "selection": self.selection,
+            "max_lag_s": self.max_lag,
+            "replicas": {replica.name: replica.as_dict() for replica in self.replicas},
+        }
+
+
+class RecentWrites:
+    """
+    Keys written in the last `window` seconds. Reads of those keys stay on
+    the primary so a client sees its own writes while replicas catch up.
+
+    Marks are kept in this worker and, when a Redis client is given,
+    shared with the other workers through short-lived Redis keys.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis | None,
+        window: float = 5.0,
+        enabled: bool = True,
+        max_entries: int = 10000,
+    ):
+        self.client = client
+        self.window = window
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self._local: OrderedDict[str, float] = OrderedDict()
+
+    async def mark(self, *keys: str) -> None:
+        if not self.enabled or not keys:
+            return
+        expires = time.monotonic() + self.window
+        for key in keys:
+            self._local[key] = expires
+            self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+        if self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(f"db:written:{key}", 1, px=int(self.window * 1000))
+            await pipe.execute()
+        except redis.RedisError as e:
+            logger.error("Could not share recent writes", keys=len(keys), error=str(e))
+
+    async def recent(self, *keys: str) -> bool:
+        """
+        True when any of `keys` was written in the last `window` seconds.
+        """
+        if not self.enabled or not keys:
+            return False
+        now = time.monotonic()
+        if any(self._local.get(key, 0) > now for key in keys):
+            return True
+        if self.client is None:
+            return False
+        try:
+            return bool(
+                await self.client.exists(*(f"db:written:{key}" for key in keys))
+            )
+        except redis.RedisError:
+            # Cannot tell, the primary is always safe
+            return True
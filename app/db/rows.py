@@ -0,0 +1,26 @@
+import dataclasses
+from collections.abc import Iterable, Sequence
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def record_type(columns: tuple[str, ...]) -> type:
+    """
+    Record class for rows with these columns, built once per column list.
+
+    Fields are read as attributes (row.user_id) and orjson serialises the
+    instances natively, so rows go from tuple to JSON without a dict or a
+    pydantic model in between. Column names must be valid identifiers;
+    alias computed columns in the query.
+    """
+    # Not slotted: orjson walks the key-sharing instance dict several times
+    # faster than slots
+    return dataclasses.make_dataclass("Record", columns, eq=False)
+
+
+def to_records(description: Sequence, rows: Iterable[Sequence]) -> list:
+    """
+    Map tuple rows to records using the cursor description of the query.
+    """
+    record = record_type(tuple(column.name for column in description))
+    return [record(*row) for row in rows]
@@ -1,28 +1,396 @@
-from contextlib import contextmanager
+import asyncio
+import time
+from contextlib import asynccontextmanager, contextmanager
 
-from psycopg2 import pool
-from psycopg2.extras import DictCursor
+import anyio
+from psycopg import OperationalError
+from psycopg.pq import TransactionStatus
+from psycopg.rows import dict_row, tuple_row
+from psycopg2.extras import DictCursor, RealDictCursor
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from starlette.concurrency import run_in_threadpool
 
-from app.core.config import Settings
+from app.core.config import settings
+from app.core.metrics import (
+    DB_ACQUIRE_DURATION,
+    DB_POOL_CONNECTIONS,
+    DB_SESSION_DURATION,
+    LatencyHistogram,
+)
+from app.db.pool import BoundedConnectionPool
+from app.db.query_stats import (
+    InstrumentedCursor,
+    SyncInstrumentedCursor,
+    current_route,
+    query_stats,
+)
+from app.db.replicas import RecentWrites, Replica, ReplicaRouter
+from app.redis.redis_instance import ar
+
+# Blocking pool, used by scripts and by the DB_SYNC_FALLBACK mode. Opens
+# nothing until used, importing the app needs no database.
+connection_pool = BoundedConnectionPool(
+    dsn=settings.DATABASE_URL,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE,
+    max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+    timeout=settings.DB_POOL_TIMEOUT,
+    max_idle=settings.DB_POOL_MAX_IDLE,
+    pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+
+async def _configure_connection(conn) -> None:
+    # psycopg keeps an LRU of prepared statements per connection, keyed by SQL text
+    conn.prepared_max = settings.DB_PREPARED_MAX
+
+
+async def _configure_replica_connection(conn) -> None:
+    await _configure_connection(conn)
+    await conn.set_read_only(True)
 
-settings = Settings()
 
-connection_pool = pool.SimpleConnectionPool(
-    minconn=3,
-    maxconn=10,
-    dsn=settings.DATABASE_URL  
+# Asyncio pool used by request handlers; opened in the app lifespan.
+# psycopg_pool grows up to max_size on demand and shrinks back to min_size
+# after max_idle, so the overflow is folded into max_size here.
+# Statements are prepared server-side after DB_PREPARE_THRESHOLD runs on a
+# connection, so hot lookups skip parsing and planning.
+prepare_threshold = (
+    settings.DB_PREPARE_THRESHOLD if settings.DB_PREPARED_STATEMENTS else None
 )
+async_pool = AsyncConnectionPool(
+    conninfo=settings.DATABASE_URL,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE + settings.DB_POOL_MAX_OVERFLOW,
+    timeout=settings.DB_POOL_TIMEOUT,
+    max_idle=settings.DB_POOL_MAX_IDLE,
+    check=AsyncConnectionPool.check_connection if settings.DB_POOL_PRE_PING else None,
+    kwargs={"row_factory": dict_row, "prepare_threshold": prepare_threshold},
+    configure=_configure_connection,
+    open=False,
+)
+async_acquire_latency = LatencyHistogram()
+
+# Read-only sessions are spread over these when DATABASE_REPLICA_URLS is set
+replica_router = ReplicaRouter(
+    [
+        Replica(
+            f"replica_{index}",
+            AsyncConnectionPool(
+                conninfo=dsn,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE + settings.DB_POOL_MAX_OVERFLOW,
+                timeout=settings.DB_POOL_TIMEOUT,
+                max_idle=settings.DB_POOL_MAX_IDLE,
+                check=(
+                    AsyncConnectionPool.check_connection
+                    if settings.DB_POOL_PRE_PING
+                    else None
+                ),
+                kwargs={
+                    "row_factory": dict_row,
+                    "prepare_threshold": prepare_threshold,
+                },
+                configure=_configure_replica_connection,
+                open=False,
+            ),
+        )
+        for index, dsn in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    selection=settings.DB_REPLICA_SELECTION,
+    max_lag=settings.DB_REPLICA_MAX_LAG,
+    check_timeout=settings.DB_REPLICA_TIMEOUT,
+)
+# Read-your-writes: reads of keys written this recently stay on the primary
+recent_writes = RecentWrites(
+    ar if settings.CACHE_REDIS_ENABLED else None,
+    window=settings.DB_READ_YOUR_WRITES_WINDOW,
+    enabled=bool(replica_router.replicas),
+)
+
+
+async def open_async_pool() -> None:
+    if settings.DB_SYNC_FALLBACK:
+        # Requests are served from the blocking pool instead
+        await run_in_threadpool(connection_pool.open)
+    else:
+        await async_pool.open(wait=True)
+        await replica_router.open()
+
+
+async def close_async_pool() -> None:
+    await replica_router.close()
+    await async_pool.close()
+    connection_pool.closeall()
+
 
 @contextmanager
 def get_db():
+    start = time.monotonic()
     conn = connection_pool.getconn()  # get a connection from the pool
+    acquired = time.monotonic()
+    DB_ACQUIRE_DURATION.labels("sync").observe(acquired - start)
+    cursor = None
     try:
         cursor = conn.cursor(cursor_factory=DictCursor)
-        yield cursor
+        yield SyncInstrumentedCursor(cursor) if settings.DB_QUERY_STATS else cursor
         conn.commit()
-    except Exception as e:
+    except Exception:
         conn.rollback()
-        raise e
+        raise
     finally:
-        cursor.close()
-        connection_pool.putconn(conn) 
+        # cursor() itself may have failed, keep that error
+        if cursor is not None:
+            cursor.close()
+        connection_pool.putconn(conn)
+        DB_SESSION_DURATION.labels("sync").observe(time.monotonic() - acquired)
+
+
+class ThreadedCursor:
+    """
+    Awaitable facade over a blocking psycopg2 cursor.
+
+    Every call is pushed to the threadpool so the event loop stays free. Only
+    used when DB_SYNC_FALLBACK is enabled.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    async def execute(self, query, params=None):
+        await run_in_threadpool(self._cursor.execute, query, params)
+        return self
+
+    async def executemany(self, query, params_seq):
+        await run_in_threadpool(self._cursor.executemany, query, params_seq)
+
+    async def fetchone(self):
+        return await run_in_threadpool(self._cursor.fetchone)
+
+    async def fetchmany(self, size: int = 0):
+        return await run_in_threadpool(
+            self._cursor.fetchmany, size or self._cursor.arraysize
+        )
+
+    async def fetchall(self):
+        return await run_in_threadpool(self._cursor.fetchall)
+
+    async def close(self):
+        self._cursor.close()
+
+
+@asynccontextmanager
+async def _get_threaded_db(tuple_rows: bool = False):
+    start = time.monotonic()
+    conn = await run_in_threadpool(connection_pool.getconn)
+    acquired = time.monotonic()
+    DB_ACQUIRE_DURATION.labels("sync").observe(acquired - start)
+    cursor = None
+    try:
+        cursor = (
+            conn.cursor() if tuple_rows else conn.cursor(cursor_factory=RealDictCursor)
+        )
+        if settings.DB_QUERY_STATS:
+            yield InstrumentedCursor(
+                ThreadedCursor(cursor),
+                new_cursor=lambda: ThreadedCursor(
+                    conn.cursor(cursor_factory=RealDictCursor)
+                ),
+            )
+        else:
+            yield ThreadedCursor(cursor)
+        await run_in_threadpool(conn.commit)
+    except Exception:
+        await run_in_threadpool(conn.rollback)
+        raise
+    finally:
+        if cursor is not None:
+            cursor.close()
+        await run_in_threadpool(connection_pool.putconn, conn)
+        DB_SESSION_DURATION.labels("sync").observe(time.monotonic() - acquired)
+
+
+async def _replica_conn(sticky: str | None):
+    """
+    A connection from a usable replica, or None to read from the primary.
+    """
+    if not replica_router.replicas or (
+        sticky is not None and await recent_writes.recent(sticky)
+    ):
+        return None, None
+    replica = replica_router.choose()
+    if replica is None:
+        return None, None
+    try:
+        conn = await replica.pool.getconn(timeout=settings.DB_REPLICA_TIMEOUT)
+    except PoolTimeout as error:
+        replica_router.mark_failed(replica, error)
+        return None, None
+    replica.in_use += 1
+    return replica, conn
+
+
+@asynccontextmanager
+async def get_async_db(
+    read_only: bool = False, sticky: str | None = None, tuple_rows: bool = False
+):
+    """
+    Yield an async cursor returning dict rows, or plain tuples with
+    `tuple_rows` (see app.db.rows for mapping them).
+
+    Commits when the block exits cleanly and rolls back on any exception,
+    mirroring get_db(). With `read_only` the session may be served by a
+    replica, unless `sticky` names a key marked in recent_writes.
+    """
+    if settings.DB_SYNC_FALLBACK:
+        async with _get_threaded_db(tuple_rows) as cursor:
+            yield cursor
+    else:
+        start = time.monotonic()
+        replica, conn = await _replica_conn(sticky) if read_only else (None, None)
+        if conn is None:
+            pool, label = async_pool, "async"
+            conn = await async_pool.getconn()
+            async_acquire_latency.observe((time.monotonic() - start) * 1000)
+        else:
+            pool, label = replica.pool, replica.name
+        acquired = time.monotonic()
+        DB_ACQUIRE_DURATION.labels(label).observe(acquired - start)
+        try:
+            # Connection.__aexit__ commits or rolls back; pooled connections stay open
+            async with (
+                conn,
+                conn.cursor(
+                    row_factory=tuple_row if tuple_rows else dict_row
+                ) as cursor,
+            ):
+                yield (
+                    InstrumentedCursor(cursor, new_cursor=conn.cursor)
+                    if settings.DB_QUERY_STATS
+                    else cursor
+                )
+        except OperationalError as error:
+            # Lost the replica mid-session; later reads go elsewhere until it is
+            # healthy again
+            if replica is not None:
+                replica_router.mark_failed(replica, error)
+            raise
+        finally:
+            if replica is not None:
+                replica.in_use -= 1
+            await pool.putconn(conn)
+            DB_SESSION_DURATION.labels(label).observe(time.monotonic() - acquired)
+
+
+async def stream_rows(query, params=None, batch_size: int = 1000):
+    """
+    Yield the rows of a read-only query in lists of up to `batch_size` dicts.
+
+    Uses a server-side cursor so only one batch is held in memory. The pooled
+    connection stays checked out until the generator is exhausted or closed,
+    and its transaction is rolled back afterwards.
+    """
+    if settings.DB_SYNC_FALLBACK:
+        async for rows in _stream_threaded(query, params, batch_size):
+            yield rows
+        return
+
+    start = time.monotonic()
+    conn = await async_pool.getconn()
+    async_acquire_latency.observe((time.monotonic() - start) * 1000)
+    DB_ACQUIRE_DURATION.labels("async").observe(time.monotonic() - start)
+    start_ns, row_count = time.perf_counter_ns(), 0
+    try:
+        cursor = conn.cursor(name="stream_rows")
+        await cursor.execute(query, params)
+        while rows := await cursor.fetchmany(batch_size):
+            row_count += len(rows)
+            yield rows
+    finally:
+        _record_stream(query, start_ns, row_count)
+        # Still runs when the client disconnects and the task is cancelled.
+        # A fetch cut off mid-flight leaves the connection busy; the pool
+        # closes those instead of reusing them.
+        with anyio.CancelScope(shield=True):
+            try:
+                if conn.info.transaction_status == TransactionStatus.INTRANS:
+                    await conn.rollback()
+            finally:
+                await async_pool.putconn(conn)
+
+
+async def _stream_threaded(query, params, batch_size: int):
+    conn = await run_in_threadpool(connection_pool.getconn)
+    start_ns, row_count = time.perf_counter_ns(), 0
+    try:
+        cursor = conn.cursor(name="stream_rows", cursor_factory=RealDictCursor)
+        await run_in_threadpool(cursor.execute, query, params)
+        while rows := await run_in_threadpool(cursor.fetchmany, batch_size):
+            row_count += len(rows)
+            yield rows
+    finally:
+        _record_stream(query, start_ns, row_count)
+        with anyio.CancelScope(shield=True):
+            try:
+                await run_in_threadpool(conn.rollback)
+            finally:
+                await run_in_threadpool(connection_pool.putconn, conn)
+
+
+def _record_stream(query, start_ns: int, row_count: int) -> None:
+    # A stream counts as one statement, timed from execute to the last batch
+    if not settings.DB_QUERY_STATS:
+        return
+    duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+    route = current_route()
+    stats = query_stats.record(query, duration_ms, row_count, route)
+    if duration_ms >= query_stats.slow_ms:
+        query_stats.log_slow(stats, duration_ms, row_count, route)
+
+
+def pool_stats() -> dict:
+    """
+    Snapshot of both connection pools for the health router.
+    """
+    stats = {"sync": connection_pool.get_stats()}
+    if not async_pool.closed:
+        async_stats = async_pool.get_stats()
+        size = async_stats.get("pool_size", 0)
+        async_stats["in_use"] = size - async_stats.get("pool_available", 0)
+        async_stats["acquire_ms"] = async_acquire_latency.snapshot()
+        async_stats["prepare_threshold"] = prepare_threshold
+        async_stats["prepared_max"] = settings.DB_PREPARED_MAX
+        stats["async"] = async_stats
+    for replica in replica_router.replicas:
+        if not replica.pool.closed:
+            replica_stats = replica.pool.get_stats()
+            replica_stats["in_use"] = replica.in_use
+            stats[replica.name] = replica_stats
+    return stats
+
+
+def observe_pool_metrics() -> None:
+    """
+    Copy pool_stats() into the db_pool_connections gauges.
+    """
+    for pool, stats in pool_stats().items():
+        DB_POOL_CONNECTIONS.labels(pool, "in_use").set(stats.get("in_use", 0))
+        DB_POOL_CONNECTIONS.labels(pool, "idle").set(stats.get("pool_available", 0))
+        DB_POOL_CONNECTIONS.labels(pool, "waiting").set(
+            stats.get("requests_waiting", 0)
+        )
+
+
+async def run_pool_metrics(interval: float) -> None:
+    # Each worker refreshes its own gauges; /metrics sums the live workers
+    while True:
+        observe_pool_metrics()
+        await asyncio.sleep(interval)
@@ -0,0 +1,37 @@
+"""
+Bulk import users from the command line, bypassing the HTTP upload limit::
+
+    python -m app.import_users users.csv
+    PASSWORD_HASH_WORKERS=16 python -m app.import_users users.ndjson --format ndjson
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.db.session import close_async_pool, open_async_pool
+from app.services.import_service import guess_format, import_users
+from app.utlis.verifyPwd import shutdown_hasher
+
+
+async def main(path: str, format: str | None) -> None:
+    await open_async_pool()
+    try:
+        with open(path, "rb") as file:
+            result = await import_users(file, format or guess_format(path))
+    finally:
+        await close_async_pool()
+        shutdown_hasher()
+    print(json.dumps(result.model_dump(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import users from an NDJSON or CSV file"
+    )
+    parser.add_argument("path")
+    parser.add_argument(
+        "--format", choices=["ndjson", "csv"], help="defaults to the file extension"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.format))
@@ -1,24 +1,50 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
+import redis
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from psycopg_pool import PoolTimeout
 
-from app.core.config import Settings
-from app.core.logging import get_logger, setup_logging
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+from app.core.security import revocations
 from app.db.migration import migration
+from app.db.session import (
+    close_async_pool,
+    open_async_pool,
+    replica_router,
+    run_pool_metrics,
+)
 from app.middleware.logging_midleware import LoggingMiddleware
-from app.redis.redis_instance import r
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.redis.cache import (
+    purge_legacy_keys,
+    start_invalidation_listener,
+    stop_invalidation_listener,
+)
+from app.redis.redis_instance import ar, r
 from app.routes.api_router import api_router
 from app.schemas.response import format_response
-
-# Loading Config
-settings = Settings()
+from app.services.user_service import user_access, warm_user_cache
+from app.utlis.verifyPwd import shutdown_hasher
 
 # Logging Config
 setup_logging()
 logger = get_logger(__name__)
 
+async def _purge_legacy_user_keys() -> None:
+    if not settings.CACHE_REDIS_ENABLED:
+        return
+    try:
+        deleted = await purge_legacy_keys(ar, "user")
+    except redis.RedisError as e:
+        logger.warning(f"Legacy user cache keys not purged: {e!s}")
+        return
+    if deleted:
+        logger.info("Legacy user cache keys purged", keys=deleted)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # StartUp Event
@@ -26,22 +52,71 @@ async def lifespan(app: FastAPI):
     # Database Migrations
     if settings.MIGRATION:
         migration()
-    # flush Redis 
-    try:
-        if r is not None:
-            r.flushdb()
-            logger.info("Redis server flushed successfully")
-        else:
-            logger.info("Redis server not available, skipping flush")
-    except Exception as e:
-            logger.warning(f"Redis server not available: {e!s}")
-            logger.info("Continuing without Redis ...")
-        
+
+    # Async database pool
+    await open_async_pool()
+
+    # Cache entries survive restarts, preload the most-read users that are missing
+    if settings.CACHE_REDIS_ENABLED and settings.CACHE_WARMUP_SIZE > 0:
+        try:
+            warmed = await asyncio.wait_for(
+                warm_user_cache(settings.CACHE_WARMUP_SIZE),
+                settings.CACHE_WARMUP_TIMEOUT,
+            )
+            logger.info("User cache warmed", users=warmed)
+        except Exception as e:
+            logger.warning(f"User cache warm-up skipped: {e!r}")
+
+    # Unversioned user:{id} keys from before the cache was namespaced, once
+    legacy_purge = asyncio.create_task(_purge_legacy_user_keys())
+
+    # Cross-worker invalidation of the in-process cache tier
+    if settings.CACHE_REDIS_ENABLED:
+        try:
+            start_invalidation_listener(r)
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener not started: {e!s}")
+
+    # Pool gauges for /metrics
+    pool_metrics = asyncio.create_task(run_pool_metrics(settings.METRICS_POOL_INTERVAL))
+    # Replica health and lag, no-op without replicas
+    replica_checks = asyncio.create_task(
+        replica_router.run_checks(settings.DB_REPLICA_CHECK_INTERVAL)
+    )
+    # Local bloom filter of revoked tokens
+    revocation_sync = asyncio.create_task(
+        revocations.run_sync(settings.AUTH_REVOCATION_SYNC_INTERVAL)
+    )
+    # Read counts that pick the users to warm up
+    access_flush = asyncio.create_task(
+        user_access.run_flush(settings.CACHE_ACCESS_FLUSH_INTERVAL)
+    )
+
     logger.info("Application is starting...")
 
     yield
     # Shutdown Event
+    background = (
+        legacy_purge,
+        pool_metrics,
+        replica_checks,
+        revocation_sync,
+        access_flush,
+    )
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await user_access.flush()
+    stop_invalidation_listener()
+    await close_async_pool()
+    # The clients were created at import but only connect on first use
+    await ar.aclose()
+    r.close()
+    shutdown_hasher()
     logger.info("Application is shutting down...")
+    # Last: flush whatever is still queued for the log writer
+    shutdown_logging()
 
 
 # FastAPI Initialization
@@ -60,6 +135,9 @@ app.add_middleware(
 # Add logging middleware
 app.add_middleware(LoggingMiddleware)
 
+# Add request metrics middleware
+app.add_middleware(MetricsMiddleware)
+
 # Add Routes
 app.include_router(api_router)
 
@@ -68,4 +146,19 @@ app.include_router(api_router)
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     logger.error(f"HTTP Exception: {exc}")
-    return JSONResponse(content=format_response(exc.status_code, exc.detail), status_code=exc.status_code)
+    # Keeps headers such as WWW-Authenticate on 401s
+    return JSONResponse(
+        content=format_response(exc.status_code, exc.detail).model_dump(),
+        status_code=exc.status_code,
+        headers=exc.headers,
+    )
+
+
+# Connection pool exhausted for longer than DB_POOL_TIMEOUT
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    logger.error(f"Database pool timeout: {exc}")
+    return JSONResponse(
+        content=format_response(503, "Database busy, please retry").model_dump(),
+        status_code=503,
+    )
@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class SamplingStats:
+    def __init__(self):
+        self.logged = 0
+        self.slow = 0
+        self.sampled_out_2xx = 0
+        self.sampled_out_3xx = 0
+        self.sampled_out_4xx = 0
+        self.sampled_out_5xx = 0
+        self.rate_limited = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class AccessLogSampler:
+    """
+    Decides which requests get an access log line.
+
+    Requests slower than `slow_ms` are always logged. Responses from 400 up
+    are kept with probability `error_rate`; responses below 400 with the
+    probability configured for their route (matched on the route template,
+    e.g. "/user/{user_id}", or the raw path), falling back to
+    `success_rate`. Route overrides never hide failures. Kept error lines
+    then pass a token bucket per (status, method, route) so a failing
+    endpoint cannot flood the log. Every skipped line is counted, and kept
+    lines carry their sample rate so volumes can be scaled back up.
+    """
+
+    def __init__(
+        self,
+        *,
+        success_rate: float = 1.0,
+        error_rate: float = 1.0,
+        slow_ms: float = 1000.0,
+        route_rates: dict[str, float] | None = None,
+        error_burst: int = 20,
+        error_refill: float = 1.0,
+        max_buckets: int = 1024,
+    ):
+        self.success_rate = success_rate
+        self.error_rate = error_rate
+        self.slow_ms = slow_ms
+        self.route_rates = route_rates or {}
+        self.error_burst = error_burst
+        self.error_refill = error_refill
+        self.max_buckets = max_buckets
+        self.stats = SamplingStats()
+        self._buckets: OrderedDict[tuple, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "AccessLogSampler":
+        return cls(
+            success_rate=settings.LOG_SAMPLE_RATE_SUCCESS,
+            error_rate=settings.LOG_SAMPLE_RATE_ERROR,
+            slow_ms=settings.LOG_SLOW_REQUEST_MS,
+            route_rates=settings.LOG_SAMPLE_ROUTE_RATES,
+            error_burst=settings.LOG_ERROR_BURST,
+            error_refill=settings.LOG_ERROR_RATE,
+        )
+
+    def sample_rate(self, route: str, path: str, status_code: int) -> float:
+        if status_code >= 400:
+            return self.error_rate
+        if route in self.route_rates:
+            return self.route_rates[route]
+        if path in self.route_rates:
+            return self.route_rates[path]
+        return self.success_rate
+
+    def should_log(
+        self, method: str, route: str, path: str, status_code: int, duration_ms: float
+    ) -> float | None:
+        """
+        Return the sample rate the line was kept at, or None to skip it.
+        """
+        if duration_ms >= self.slow_ms:
+            self.stats.slow += 1
+            self.stats.logged += 1
+            return 1.0
+
+        rate = self.sample_rate(route, path, status_code)
+        if rate < 1.0 and random.random() >= rate:
+            self._count_sampled_out(status_code)
+            return None
+
+        if status_code >= 400 and not self._take_error_token(
+            (status_code, method, route)
+        ):
+            self.stats.rate_limited += 1
+            return None
+
+        self.stats.logged += 1
+        return rate
+
+    def _count_sampled_out(self, status_code: int) -> None:
+        if status_code >= 500:
+            self.stats.sampled_out_5xx += 1
+        elif status_code >= 400:
+            self.stats.sampled_out_4xx += 1
+        elif status_code >= 300:
+            self.stats.sampled_out_3xx += 1
+        else:
+            self.stats.sampled_out_2xx += 1
+
+    def _take_error_token(self, key: tuple) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(
+                    self.error_refill, self.error_burst
+                )
+                if len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(now)
+
+    def stats_dict(self) -> dict:
+        stats = self.stats.as_dict()
+        stats["success_rate"] = self.success_rate
+        stats["error_rate"] = self.error_rate
+        stats["slow_ms"] = self.slow_ms
+        stats["route_rates"] = self.route_rates
+        return stats
+
+
+access_log_sampler = AccessLogSampler.from_settings()
@@ -4,83 +4,132 @@ import json
 import logging
 import time
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
-from starlette.types import Message
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
 
 # Assuming your get_logger is in app.core.logging
 from app.core.logging import get_logger
+from app.middleware.log_sampling import AccessLogSampler, access_log_sampler
+from app.utlis.routeTemplate import route_template
 
 logger = get_logger("app.middleware")
 
-# A helper function to read the request body without consuming it
-async def set_body(request: Request, body: bytes):
-    async def receive() -> Message:
-        return {"type": "http.request", "body": body}
-    request._receive = receive
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        start_time = time.time()
-        
-        # Read the request body to make it available for logging in case of an error
-        req_body_bytes = await request.body()
-        await set_body(request, req_body_bytes)
+def _log_level(status_code: int) -> tuple[int, str]:
+    # Log level and message based on response status
+    if status_code >= 500:
+        return logging.ERROR, "HTTP server error"
+    if status_code >= 400:
+        return logging.WARNING, "HTTP client error"
+    return logging.INFO, "HTTP request"
+
+
+def _decode_body(body: bytes):
+    try:
+        # Attempt to parse as JSON for structured logging
+        return json.loads(body.decode())
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # Fallback to plain text if not valid JSON
+        return body.decode(errors="ignore")
+
+
+class LoggingMiddleware:
+    """
+    Logs one line per HTTP request once the response has been sent.
+
+    Written as plain ASGI so request and response bodies stream through
+    untouched. The request body is copied aside as the app reads it, up to
+    `max_body_size` bytes, and only logged when the response is an error.
+    Which requests are logged at all is up to the sampler.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_body_size: int = settings.LOG_REQUEST_BODY_MAX_BYTES,
+        sampler: AccessLogSampler = access_log_sampler,
+    ):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.sampler = sampler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_ns = time.perf_counter_ns()
+        body = bytearray()
+        body_truncated = False
+        status_code = 500
+        response_started = False
+
+        async def receive_with_tee() -> Message:
+            nonlocal body_truncated
+            message = await receive()
+            if message["type"] == "http.request" and not body_truncated:
+                chunk = message.get("body", b"")
+                room = self.max_body_size - len(body)
+                body.extend(chunk[:room])
+                body_truncated = len(chunk) > room
+            return message
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_started = True
+            await send(message)
+
+        client = scope.get("client")
+        log_extra = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "client_ip": client[0] if client else None,
+        }
 
         # Process the request and correctly handle exceptions
         try:
-            response = await call_next(request)
+            await self.app(scope, receive_with_tee, send_with_status)
         except Exception:
-            duration_ms = round((time.time() - start_time) * 1000, 2)
-            logger.exception(
-                "Unhandled server error",
-                extra={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "duration_ms": duration_ms,
-                    "client_ip": request.client.host,
-                }
-            )
+            duration_ns = time.perf_counter_ns() - start_ns
+            log_extra["duration_ms"] = round(duration_ns / 1_000_000, 2)
+            logger.exception("Unhandled server error", extra=log_extra)
+            if response_started:
+                raise
             # This is critical: return a proper 500 response
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500,
                 content={"detail": "An internal server error occurred."},
             )
+            await response(scope, receive, send)
+            return
 
-        duration_ms = round((time.time() - start_time) * 1000, 2)
-        status_code = response.status_code
+        duration_ms = round((time.perf_counter_ns() - start_ns) / 1_000_000, 2)
+        # Route template once routing has run, e.g. /user/{user_id}
+        route = route_template(scope, scope["path"])
+        sample_rate = self.sampler.should_log(
+            scope["method"], route, scope["path"], status_code, duration_ms
+        )
+        if sample_rate is None:
+            return
 
-        # Determine log level and message based on response status
-        log_level = logging.INFO
-        log_message = "HTTP request"
-        if status_code >= 500:
-            log_level = logging.ERROR
-            log_message = "HTTP server error"
-        elif status_code >= 400:
-            log_level = logging.WARNING
-            log_message = "HTTP client error"
+        log_extra["query"] = scope["query_string"].decode("latin-1")
+        log_extra["status_code"] = status_code
+        log_extra["duration_ms"] = duration_ms
+        if sample_rate < 1.0:
+            # Each line stands for 1 / sample_rate requests
+            log_extra["sample_rate"] = sample_rate
 
-        log_extra = {
-            "method": request.method,
-            "path": request.url.path,
-            "query": str(request.query_params),
-            "status_code": status_code,
-            "duration_ms": duration_ms,
-            "client_ip": request.client.host,
-        }
-        
-        # Conditionally log the request body for client errors for easier debugging
+        # Conditionally log the request body for client errors for easier debugging.
+        # Only what the app actually read is available.
         if status_code >= 400:
-            try:
-                # Attempt to parse as JSON for structured logging
-                log_extra["request_body"] = json.loads(req_body_bytes.decode())
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                # Fallback to plain text if not valid JSON
-                log_extra["request_body"] = req_body_bytes.decode(errors="ignore")
+            log_extra["request_body"] = _decode_body(bytes(body))
+            if body_truncated:
+                log_extra["request_body_truncated"] = True
 
         # Log the single, consolidated message
+        log_level, log_message = _log_level(status_code)
         logger.log(log_level, log_message, extra=log_extra)
-        
-        return response
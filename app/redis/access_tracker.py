@@ -0,0 +1,77 @@
+import asyncio
+from collections import Counter
+
+import redis
+import redis.asyncio
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class AccessTracker:
+    """
+    Approximate read counts of the most-read keys, shared through a Redis
+    sorted set.
+
+    Reads are counted in process and added to the set every flush, so
+    recording one costs no round trip. The set keeps only the `capacity`
+    highest counts, and all counts are halved once per `half_life` seconds
+    so keys that stop being read fall out of the top.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis | None,
+        key: str,
+        capacity: int = 10000,
+        half_life: int = 3600,
+    ):
+        self.client = client
+        self.key = key
+        self.capacity = capacity
+        self.half_life = half_life
+        self.flushed = 0
+        self._pending: Counter[str] = Counter()
+
+    def record(self, member: str) -> None:
+        if self.client is not None:
+            self._pending[member] += 1
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, Counter()
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for member, count in pending.items():
+                pipe.zincrby(self.key, count, member)
+            pipe.zremrangebyrank(self.key, 0, -self.capacity - 1)
+            await pipe.execute()
+            self.flushed += len(pending)
+            # The first worker to get the marker decays the counts for everyone
+            if await self.client.set(
+                f"{self.key}:decay", 1, nx=True, ex=self.half_life
+            ):
+                await self.client.zunionstore(self.key, {self.key: 0.5})
+        except redis.RedisError as e:
+            logger.warning("Access counts not flushed", keys=len(pending), error=str(e))
+
+    async def run_flush(self, interval: float) -> None:
+        if self.client is None:
+            return
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def top(self, n: int) -> list[str]:
+        """
+        The `n` most-read keys, most read first.
+        """
+        if self.client is None or n <= 0:
+            return []
+        members = await self.client.zrevrange(self.key, 0, n - 1)
+        return [member.decode() for member in members]
+
+    def stats_dict(self) -> dict:
+        return {"pending": len(self._pending), "flushed": self.flushed}
@@ -0,0 +1,59 @@
+"""
+Batch reads and writes over the async client, each in one round trip.
+
+Large batches are split into commands of BATCH_SIZE keys so a single call
+does not hold up the server for long; the chunks still share one pipeline.
+"""
+
+from collections.abc import Iterable
+
+import redis.asyncio
+
+BATCH_SIZE = 500
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def get_many(client: redis.asyncio.Redis, keys: list[str]) -> list[bytes | None]:
+    """
+    Values of `keys` in order, None for missing keys.
+    """
+    if not keys:
+        return []
+    pipe = client.pipeline(transaction=False)
+    for chunk in _chunks(keys, BATCH_SIZE):
+        pipe.mget(chunk)
+    return [value for values in await pipe.execute() for value in values]
+
+
+async def set_many(
+    client: redis.asyncio.Redis,
+    items: Iterable[tuple[str, bytes, int]],
+    nx: bool = False,
+) -> int:
+    """
+    SET every (key, value, ttl). With `nx`, existing keys are left alone.
+    Returns the number of keys written.
+    """
+    pipe = client.pipeline(transaction=False)
+    for key, value, ttl in items:
+        pipe.set(key, value, ex=ttl, nx=nx)
+    if not len(pipe):
+        return 0
+    return sum(bool(written) for written in await pipe.execute())
+
+
+async def delete_many(client: redis.asyncio.Redis, keys: list[str]) -> int:
+    """
+    UNLINK `keys`, freeing their memory off the main thread. Returns the
+    number of keys that existed.
+    """
+    if not keys:
+        return 0
+    pipe = client.pipeline(transaction=False)
+    for chunk in _chunks(keys, BATCH_SIZE):
+        pipe.unlink(*chunk)
+    return sum(await pipe.execute())
@@ -0,0 +1,589 @@
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import Any
+
+import orjson
+import redis
+import redis.asyncio
+
+from app.core.logging import get_logger
+from app.core.metrics import CACHE_EVENTS
+from app.redis.batch import BATCH_SIZE, delete_many, get_many
+from app.redis.local_cache import MISSING, LocalCache
+
+logger = get_logger(__name__)
+
+# Workers tell each other to drop L1 entries through this channel
+INVALIDATION_CHANNEL = "cache:invalidate"
+_WORKER_ID = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Stored instead of a value to remember that the loader found nothing
+NEGATIVE_SENTINEL = b"\x00"
+
+# Read the current version and the entry stored under it in one round trip
+_READ_SCRIPT = """
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('GET', ARGV[1] .. version)}
+"""
+
+# _READ_SCRIPT for many keys: versions and entries, interleaved
+_READ_MANY_SCRIPT = """
+local result = {}
+for i, key in ipairs(KEYS) do
+    local version = redis.call('GET', key) or '0'
+    result[2 * i - 1] = version
+    result[2 * i] = redis.call('GET', ARGV[i] .. version)
+end
+return result
+"""
+
+# Only release a lock we still own
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+# Every RedisCache registers itself here for cache_stats()
+_registry: dict[str, "RedisCache"] = {}
+
+
+class CacheStats:
+    """
+    Per-process counters, mirrored into the cache_events_total metric.
+    """
+
+    EVENTS = (
+        "hits",
+        "negative_hits",
+        "misses",
+        "loads",
+        "lock_waits",
+        "invalidations",
+        "errors",
+        "local_hits",
+        "warmed",
+    )
+
+    def __init__(self, cache: str):
+        self._counts = dict.fromkeys(self.EVENTS, 0)
+        self._metrics = {
+            event: CACHE_EVENTS.labels(cache, event) for event in self.EVENTS
+        }
+
+    def incr(self, event: str, amount: int = 1) -> None:
+        self._counts[event] += amount
+        self._metrics[event].inc(amount)
+
+    def as_dict(self) -> dict:
+        return dict(self._counts)
+
+
+class RedisCache:
+    """
+    Read-through cache over an asyncio Redis client.
+
+    Entries are stored under versioned keys
+    (`<prefix>:<namespace>:<key>:v<version>`). Invalidating bumps the version
+    instead of deleting the entry, so a reader that loaded stale rows before
+    a write can only ever populate a key nobody reads any more. Every entry
+    write renews its version key's TTL (`version_ttl`, well above any entry
+    TTL), so a version key only expires once nothing stored under it is left
+    and idle keys do not pile up. Run Redis with volatile-ttl eviction so
+    entries, which expire sooner, are evicted before their version keys.
+
+    The namespace separates entries written by deploys that cache different
+    shapes; old entries simply expire. Version keys are not namespaced, so a
+    write invalidates the entries of every deploy still running.
+
+    Misses are guarded by a short Redis lock: one caller loads from the
+    source of truth while the others poll for the entry it writes, and load
+    themselves only if it does not appear within `lock_wait` seconds.
+    Missing values are cached for `negative_ttl` seconds.
+
+    With a `local` LocalCache, decoded entries are also kept in process and
+    invalidations are broadcast to the other workers over Redis pub/sub (see
+    start_invalidation_listener). Without a `client` only the local tier is
+    used.
+    """
+
+    def __init__(
+        self,
+        client: redis.asyncio.Redis | None,
+        prefix: str,
+        ttl: int,
+        *,
+        namespace: str = "1",
+        ttl_jitter: float = 0.1,
+        negative_ttl: int = 30,
+        lock_timeout: float = 5.0,
+        lock_wait: float = 1.0,
+        local: LocalCache | None = None,
+    ):
+        self.client = client
+        self.local = local
+        self.prefix = prefix
+        self.namespace = namespace
+        self.ttl = ttl
+        self.ttl_jitter = ttl_jitter
+        self.negative_ttl = negative_ttl
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self.version_ttl = math.ceil(
+            2 * max(ttl, negative_ttl) * (1 + ttl_jitter) + lock_timeout
+        )
+        self.stats = CacheStats(prefix)
+        if client is not None:
+            self._read = client.register_script(_READ_SCRIPT)
+            self._read_many = client.register_script(_READ_MANY_SCRIPT)
+            self._release = client.register_script(_RELEASE_SCRIPT)
+        _registry[prefix] = self
+
+    def _version_key(self, version_key: str) -> str:
+        return f"{self.prefix}:ver:{version_key}"
+
+    def _entry_prefix(self, key: str) -> str:
+        return f"{self.prefix}:{self.namespace}:{key}:v"
+
+    def _expiry(self, ttl: int) -> int:
+        # Spread expiries so entries written together do not expire together
+        return max(
+            1, round(ttl * (1 + random.uniform(-self.ttl_jitter, self.ttl_jitter)))
+        )
+
+    async def _lookup(self, key: str, version_key: str) -> tuple[str, bytes | None]:
+        version, raw = await self._read(
+            keys=[self._version_key(version_key)], args=[self._entry_prefix(key)]
+        )
+        return version.decode(), raw
+
+    def _decode(self, raw: bytes) -> Any:
+        if raw == NEGATIVE_SENTINEL:
+            self.stats.incr("negative_hits")
+            return None
+        self.stats.incr("hits")
+        return orjson.loads(raw)
+
+    async def _write(
+        self, entries: list[tuple[str, str, Any]], nx: bool = False
+    ) -> int:
+        """
+        Store (version_key, entry_key, value) entries in one round trip,
+        renewing their version keys. Returns the number of entries written.
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for version_key, entry_key, value in entries:
+            if value is None:
+                pipe.set(
+                    entry_key,
+                    NEGATIVE_SENTINEL,
+                    ex=self._expiry(self.negative_ttl),
+                    nx=nx,
+                )
+            else:
+                pipe.set(
+                    entry_key,
+                    orjson.dumps(value, default=str),
+                    ex=self._expiry(self.ttl),
+                    nx=nx,
+                )
+            pipe.expire(self._version_key(version_key), self.version_ttl)
+        return sum(bool(written) for written in (await pipe.execute())[::2])
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        version_key: str | None = None,
+    ) -> tuple[Any, bool]:
+        """
+        Return (value, from_cache). `loader` returns None for missing values.
+
+        Entries sharing a `version_key` are invalidated together; it defaults
+        to the entry key itself.
+        """
+        version_key = version_key or key
+        if self.local is None:
+            return await self._get_or_load_remote(key, loader, version_key)
+
+        value = self.local.get(key)
+        if value is not MISSING:
+            self.stats.incr("local_hits")
+            return value, True
+        epoch = self.local.epoch
+        value, cached = await self._get_or_load_remote(key, loader, version_key)
+        self.local.set(key, value, group=version_key, epoch=epoch)
+        return value, cached
+
+    async def get_many_or_load(
+        self,
+        keys: list[str],
+        loader: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        """
+        get_or_load() for many keys, each versioned by itself. Returns
+        {key: value} with None for missing values.
+
+        Cached entries are read in one round trip and all misses are passed
+        to a single `loader` call, which returns {key: value} for the keys it
+        finds. Misses take no loader locks: concurrent batches may load the
+        same keys, but with one query each.
+        """
+        values = {}
+        remaining = []
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key) if self.local is not None else MISSING
+            if value is MISSING:
+                remaining.append(key)
+            else:
+                self.stats.incr("local_hits")
+                values[key] = value
+        if not remaining:
+            return values
+
+        epoch = self.local.epoch if self.local is not None else None
+        loaded = await self._get_many_or_load_remote(remaining, loader)
+        if self.local is not None:
+            for key, value in loaded.items():
+                self.local.set(key, value, epoch=epoch)
+        return values | loaded
+
+    async def _get_many_or_load_remote(
+        self,
+        keys: list[str],
+        loader: Callable[[list[str]], Awaitable[dict[str, Any]]],
+    ) -> dict[str, Any]:
+        if self.client is None:
+            self.stats.incr("loads", len(keys))
+            found = await loader(keys)
+            return {key: found.get(key) for key in keys}
+        try:
+            reply = await self._read_many(
+                keys=[self._version_key(key) for key in keys],
+                args=[self._entry_prefix(key) for key in keys],
+            )
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.warning(
+                "Cache read failed, loading from source", keys=len(keys), error=str(e)
+            )
+            found = await loader(keys)
+            return {key: found.get(key) for key in keys}
+
+        values = {}
+        entry_keys = {}
+        for key, version, raw in zip(keys, reply[::2], reply[1::2], strict=True):
+            if raw is not None:
+                values[key] = self._decode(raw)
+            else:
+                entry_keys[key] = self._entry_prefix(key) + version.decode()
+        if not entry_keys:
+            return values
+
+        self.stats.incr("misses", len(entry_keys))
+        self.stats.incr("loads", len(entry_keys))
+        found = await loader(list(entry_keys))
+        entries = []
+        for key, entry_key in entry_keys.items():
+            values[key] = found.get(key)
+            entries.append((key, entry_key, values[key]))
+        try:
+            await self._write(entries)
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.warning("Cache write failed", keys=len(entries), error=str(e))
+        return values
+
+    async def _get_or_load_remote(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        version_key: str,
+    ) -> tuple[Any, bool]:
+        if self.client is None:
+            self.stats.incr("loads")
+            return await loader(), False
+        try:
+            version, raw = await self._lookup(key, version_key)
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.warning(
+                "Cache read failed, loading from source", key=key, error=str(e)
+            )
+            return await loader(), False
+
+        if raw is not None:
+            return self._decode(raw), True
+        self.stats.incr("misses")
+
+        entry_key = self._entry_prefix(key) + version
+        lock_key = f"{entry_key}:lock"
+        token = uuid.uuid4().hex
+        try:
+            locked = await self.client.set(
+                lock_key, token, nx=True, px=int(self.lock_timeout * 1000)
+            )
+            if not locked:
+                self.stats.incr("lock_waits")
+                raw = await self._wait_for(entry_key)
+                if raw is not None:
+                    return self._decode(raw), True
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.warning(
+                "Cache lock failed, loading from source", key=key, error=str(e)
+            )
+            locked = False
+
+        self.stats.incr("loads")
+        try:
+            # Errors from the loader, Redis ones included, go to the caller
+            value = await loader()
+            try:
+                await self._write([(version_key, entry_key, value)])
+            except redis.RedisError as e:
+                self.stats.incr("errors")
+                logger.warning("Cache write failed", key=key, error=str(e))
+        finally:
+            if locked:
+                await self._release_lock(lock_key, token)
+        return value, False
+
+    async def _release_lock(self, lock_key: str, token: str) -> None:
+        try:
+            await self._release(keys=[lock_key], args=[token])
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.warning("Cache lock release failed", key=lock_key, error=str(e))
+
+    async def _wait_for(self, entry_key: str) -> bytes | None:
+        deadline = asyncio.get_running_loop().time() + self.lock_wait
+        delay = 0.01
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(delay)
+            raw = await self.client.get(entry_key)
+            if raw is not None:
+                return raw
+            delay = min(delay * 2, 0.1)
+        return None
+
+    async def warm(
+        self,
+        keys: list[str],
+        loader: Callable[[list[str]], Awaitable[dict[str, Any]]],
+        lock_timeout: float = 60.0,
+    ) -> int:
+        """
+        Store the entries among `keys` that are not cached yet, loading them
+        with one `loader` call that returns {key: value} for the keys it finds.
+        Only for entries versioned by their own key. Returns the number of
+        entries written, or 0 when another worker is already warming.
+        """
+        if self.client is None or not keys:
+            return 0
+        lock_key = f"{self.prefix}:{self.namespace}:warmup"
+        token = uuid.uuid4().hex
+        if not await self.client.set(
+            lock_key, token, nx=True, px=int(lock_timeout * 1000)
+        ):
+            return 0
+        try:
+            # Versions are read before loading, like get_or_load, so a write
+            # racing the warm-up leaves its entry unreachable
+            versions = await get_many(
+                self.client, [self._version_key(key) for key in keys]
+            )
+            entry_keys = {
+                key: self._entry_prefix(key) + (version or b"0").decode()
+                for key, version in zip(keys, versions, strict=True)
+            }
+            cached = await get_many(self.client, list(entry_keys.values()))
+            missing = [
+                key for key, raw in zip(entry_keys, cached, strict=True) if raw is None
+            ]
+            if not missing:
+                return 0
+            values = await loader(missing)
+            # nx: never replace an entry a request stored in the meantime
+            written = await self._write(
+                [(key, entry_keys[key], value) for key, value in values.items()],
+                nx=True,
+            )
+            self.stats.incr("warmed", written)
+            return written
+        finally:
+            await self._release_lock(lock_key, token)
+
+    async def invalidate(self, version_key: str) -> None:
+        self.stats.incr("invalidations")
+        if self.local is not None:
+            self.local.invalidate(version_key)
+        if self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.incr(self._version_key(version_key))
+            pipe.expire(self._version_key(version_key), self.version_ttl)
+            if self.local is not None:
+                message = {
+                    "origin": _WORKER_ID,
+                    "prefix": self.prefix,
+                    "key": version_key,
+                }
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps(message))
+            await pipe.execute()
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.error("Cache invalidation failed", key=version_key, error=str(e))
+
+    async def invalidate_many(self, version_keys: list[str]) -> None:
+        """
+        invalidate() for many keys in a single Redis round trip.
+        """
+        if not version_keys:
+            return
+        self.stats.incr("invalidations", len(version_keys))
+        if self.local is not None:
+            for version_key in version_keys:
+                self.local.invalidate(version_key)
+        if self.client is None:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for version_key in version_keys:
+                pipe.incr(self._version_key(version_key))
+                pipe.expire(self._version_key(version_key), self.version_ttl)
+                if self.local is not None:
+                    message = {
+                        "origin": _WORKER_ID,
+                        "prefix": self.prefix,
+                        "key": version_key,
+                    }
+                    pipe.publish(INVALIDATION_CHANNEL, json.dumps(message))
+            await pipe.execute()
+        except redis.RedisError as e:
+            self.stats.incr("errors")
+            logger.error(
+                "Cache invalidation failed", keys=len(version_keys), error=str(e)
+            )
+
+    def stats_dict(self) -> dict:
+        stats = self.stats.as_dict()
+        if self.local is not None:
+            stats["local"] = self.local.stats.as_dict() | {"size": len(self.local)}
+        return stats
+
+
+async def purge_legacy_keys(client: redis.asyncio.Redis, prefix: str) -> int:
+    """
+    Delete `<prefix>:<id>` keys written before entries were versioned. They
+    have no TTL and hold whole rows, so they would otherwise stay forever.
+    Runs once per Redis: the first worker to set the marker does the scan,
+    and the marker is removed again if the scan fails.
+    Returns the number of keys deleted.
+    """
+    marker = f"{prefix}:legacy-purged"
+    if not await client.set(marker, 1, nx=True):
+        return 0
+    deleted = 0
+    try:
+        batch = []
+        async for key in client.scan_iter(match=f"{prefix}:[0-9]*", count=1000):
+            # Versioned entries (<prefix>:<namespace>:<key>:v<n>) match too
+            if key[len(prefix) + 1 :].isdigit():
+                batch.append(key)
+            if len(batch) >= BATCH_SIZE:
+                deleted += await delete_many(client, batch)
+                batch = []
+        deleted += await delete_many(client, batch)
+    except BaseException:
+        with suppress(redis.RedisError):
+            await client.delete(marker)
+        raise
+    return deleted
+
+
+def cache_stats() -> dict:
+    return {prefix: cache.stats_dict() for prefix, cache in _registry.items()}
+
+
+# ─── Cross-worker L1 invalidation ───
+
+_listener = None
+
+
+def _on_invalidation(message: dict) -> None:
+    try:
+        data = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return
+    if data.get("origin") == _WORKER_ID:
+        return
+    cache = _registry.get(data.get("prefix"))
+    if cache is not None and cache.local is not None:
+        cache.local.invalidate(data["key"])
+
+
+def _on_listener_error(error: Exception, pubsub, thread) -> None:
+    # Messages may have been missed while disconnected; start L1 from scratch
+    logger.warning("Cache invalidation listener error", error=str(error))
+    for cache in _registry.values():
+        if cache.local is not None:
+            cache.local.clear()
+    time.sleep(1.0)
+
+
+def start_invalidation_listener(client: redis.Redis) -> None:
+    """
+    Subscribe to INVALIDATION_CHANNEL on a background thread.
+    """
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        return
+    if not any(cache.local is not None for cache in _registry.values()):
+        return
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+    _listener = pubsub.run_in_thread(
+        sleep_time=1.0,
+        daemon=True,
+        exception_handler=_on_listener_error,
+    )
+
+
+def stop_invalidation_listener() -> None:
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.stop()
+        _listener.join(timeout=2.0)
+        _listener = None
+
+
+def redis_stats(client: redis.Redis) -> dict:
+    """
+    Server-side counters relevant to sizing Redis.
+    """
+    try:
+        info = client.info()
+    except redis.RedisError as e:
+        return {"error": str(e)}
+    keys = (
+        "used_memory",
+        "used_memory_peak",
+        "maxmemory",
+        "maxmemory_policy",
+        "keyspace_hits",
+        "keyspace_misses",
+        "evicted_keys",
+        "expired_keys",
+    )
+    return {key: info.get(key) for key in keys}
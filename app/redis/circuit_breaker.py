@@ -0,0 +1,90 @@
+import time
+
+import redis
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Failures counted by the breaker; anything else is a reply from a healthy server
+FAILURES = (redis.ConnectionError, redis.TimeoutError)
+
+
+class CircuitOpenError(redis.ConnectionError):
+    """
+    Raised instead of calling Redis while the circuit is open. Subclasses
+    ConnectionError so existing `except redis.RedisError` fallbacks apply.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling Redis after `threshold` consecutive connection failures or
+    timeouts, so callers fall back to the database at once instead of each
+    waiting for a socket timeout.
+
+    After `reset_timeout` seconds one call is let through as a trial; success
+    closes the circuit, failure keeps it open for another `reset_timeout`.
+    Replies such as NOSCRIPT or WRONGTYPE are not failures and count as a
+    successful trial.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 5.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> None:
+        if self._opened_at is None:
+            return
+        now = time.monotonic()
+        if now - self._opened_at < self.reset_timeout:
+            self.rejected += 1
+            raise CircuitOpenError("Redis circuit breaker is open")
+        # This call is the trial; the others keep failing fast meanwhile
+        self._opened_at = now
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Redis reachable again, circuit closed")
+            self._opened_at = None
+        self.failures = 0
+
+    def record_error(self, error: redis.RedisError) -> None:
+        # An error reply still proves the server is up, and closes a trial
+        if isinstance(error, FAILURES):
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures < self.threshold:
+            return
+        if self._opened_at is None:
+            self.trips += 1
+            logger.error(
+                "Redis unavailable, circuit opened",
+                failures=self.failures,
+                reset_timeout=self.reset_timeout,
+            )
+        self._opened_at = time.monotonic()
+
+    def stats_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
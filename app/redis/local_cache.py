@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+# Returned by LocalCache.get() when nothing usable is cached
+MISSING = object()
+
+
+class LocalCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL.
+
+    Values are kept decoded, so a hit costs neither a Redis round trip nor a
+    json.loads. Entries belong to a group (the RedisCache version key) so a
+    group can be dropped in one call when another worker invalidates it.
+
+    `epoch` moves on every invalidation; callers read it before fetching from
+    the next tier and pass it back to set(), which drops the write if an
+    invalidation happened in between. Cached values are shared, callers must
+    treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.epoch = 0
+        self.stats = LocalCacheStats()
+        self._entries: OrderedDict[str, tuple[float, str, Any]] = OrderedDict()
+        self._groups: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """
+        Return the cached value, or MISSING.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return MISSING
+            expires_at, group, value = entry
+            if expires_at <= now:
+                self._remove(key, group)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(
+        self, key: str, value: Any, group: str | None = None, epoch: int | None = None
+    ) -> None:
+        group = group or key
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._discard_from_group(key, old[1])
+            self._entries[key] = (time.monotonic() + self.ttl, group, value)
+            self._groups.setdefault(group, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, (_, evicted_group, _) = self._entries.popitem(last=False)
+                self._discard_from_group(evicted, evicted_group)
+                self.stats.evictions += 1
+
+    def invalidate(self, group: str) -> None:
+        with self._lock:
+            self.epoch += 1
+            self.stats.invalidations += 1
+            for key in self._groups.pop(group, ()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+            self._groups.clear()
+
+    def _remove(self, key: str, group: str) -> None:
+        self._entries.pop(key, None)
+        self._discard_from_group(key, group)
+
+    def _discard_from_group(self, key: str, group: str) -> None:
+        keys = self._groups.get(group)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,5 +1,126 @@
 import redis
+import redis.asyncio
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.retry import Retry
 
 from app.core.config import settings
+from app.redis.circuit_breaker import CircuitBreaker
 
-r = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+# One circuit for both clients, they talk to the same server
+breaker = CircuitBreaker(
+    settings.REDIS_BREAKER_THRESHOLD, settings.REDIS_BREAKER_RESET_TIMEOUT
+)
+
+
+class GuardedPipeline(redis.client.Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        breaker.allow()
+        try:
+            result = super().execute(raise_on_error)
+        except redis.RedisError as error:
+            breaker.record_error(error)
+            raise
+        breaker.record_success()
+        return result
+
+
+class GuardedRedis(redis.Redis):
+    """
+    redis.Redis whose commands and pipelines go through the circuit breaker.
+    """
+
+    def execute_command(self, *args, **options):
+        breaker.allow()
+        try:
+            result = super().execute_command(*args, **options)
+        except redis.RedisError as error:
+            breaker.record_error(error)
+            raise
+        breaker.record_success()
+        return result
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> GuardedPipeline:
+        return GuardedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class AsyncGuardedPipeline(redis.asyncio.client.Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        breaker.allow()
+        try:
+            result = await super().execute(raise_on_error)
+        except redis.RedisError as error:
+            breaker.record_error(error)
+            raise
+        breaker.record_success()
+        return result
+
+
+class AsyncGuardedRedis(redis.asyncio.Redis):
+    """
+    redis.asyncio.Redis whose commands and pipelines go through the circuit breaker.
+    """
+
+    async def execute_command(self, *args, **options):
+        breaker.allow()
+        try:
+            result = await super().execute_command(*args, **options)
+        except redis.RedisError as error:
+            breaker.record_error(error)
+            raise
+        breaker.record_success()
+        return result
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> AsyncGuardedPipeline:
+        return AsyncGuardedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+def _connection_kwargs(retry_class) -> dict:
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": settings.REDIS_DB,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        # Seconds to wait for a free connection once all are in use
+        "timeout": settings.REDIS_POOL_TIMEOUT,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL,
+        # Dropped connections are retried; timeouts are not, as retrying would
+        # only slow a slow server down further
+        "retry": retry_class(
+            ExponentialWithJitterBackoff(
+                cap=settings.REDIS_RETRY_BACKOFF_CAP,
+                base=settings.REDIS_RETRY_BACKOFF_BASE,
+            ),
+            settings.REDIS_RETRIES,
+            supported_errors=(redis.ConnectionError,),
+        ),
+    }
+
+
+# Blocking client for threads and code that cannot await; connects on first use
+r = GuardedRedis(
+    connection_pool=redis.BlockingConnectionPool(**_connection_kwargs(Retry))
+)
+# Client for async routes
+ar = AsyncGuardedRedis(
+    connection_pool=redis.asyncio.BlockingConnectionPool(
+        **_connection_kwargs(AsyncRetry)
+    )
+)
+
+
+def redis_client_stats() -> dict:
+    return {
+        "breaker": breaker.stats_dict(),
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+    }
@@ -1,10 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+
+from app.core.security import get_current_user
 from app.routes.auth_routes import router as auth_router
 from app.routes.health_routes import router as health_router
+from app.routes.metrics_routes import router as metrics_router
 from app.routes.user_routes import router as user_router
 
 api_router = APIRouter()
 
 api_router.include_router(health_router, prefix="/health", tags=["Health"])
-api_router.include_router(user_router, prefix="/user", tags=["Users"])
-api_router.include_router(auth_router, prefix="/auth", tags=["Auth"])
\ No newline at end of file
+api_router.include_router(
+    user_router,
+    prefix="/user",
+    tags=["Users"],
+    dependencies=[Depends(get_current_user)],
+)
+api_router.include_router(auth_router, prefix="/auth", tags=["Auth"])
+api_router.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
@@ -1,15 +1,22 @@
-from fastapi import APIRouter
+from typing import Annotated
 
-from app.schemas.auth import *
+from fastapi import APIRouter, BackgroundTasks, Depends
+
+from app.core.security import get_current_user
+from app.schemas.auth import LoginRequest, SignUpRequest
 from app.services import auth_service
 
 router = APIRouter()
 
 @router.post("/login")
-async def login(loginRequest: LoginRequest):
-    return await auth_service.login(loginRequest)
+async def login(loginRequest: LoginRequest, background_tasks: BackgroundTasks):
+    return await auth_service.login(loginRequest, background_tasks)
 
 @router.post("/signup")
 async def signup(userData: SignUpRequest):
     return await auth_service.signup(userData)
 
+
+@router.post("/logout")
+async def logout(claims: Annotated[dict, Depends(get_current_user)]):
+    return await auth_service.logout(claims)
@@ -1,10 +1,31 @@
-from fastapi import APIRouter, HTTPException
+from typing import Literal
 
-from app.db.session import get_db
-from app.schemas.response import BaseResponse, format_response
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.core.config import settings
+from app.core.logging import logging_stats
+from app.core.security import auth_stats, get_current_user
+from app.db.query_builder import compile_cache_stats
+from app.db.query_stats import query_stats
+from app.db.session import get_async_db, pool_stats, replica_router
+from app.middleware.log_sampling import access_log_sampler
+from app.redis.cache import cache_stats, redis_stats
+from app.redis.redis_instance import r, redis_client_stats
+from app.schemas.response import BaseResponse, DataResponse, format_response
+from app.services.user_service import user_access
+from app.shared.constants import QUERY_STATS_LIMIT_DESC, QUERY_STATS_ORDER_DESC
+from app.utlis.singleFlight import single_flight_stats
+from app.utlis.verifyPwd import hasher_stats
 
 router = APIRouter()
 
+
+def query_health_enabled():
+    # The query stats show SQL and EXPLAIN plans, so they are hidden unless turned on
+    if not settings.HEALTH_QUERIES_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
 # Health API
 @router.get(
     "", 
@@ -15,10 +36,156 @@ router = APIRouter()
         500: {"model": BaseResponse, "description": "Internal Server Error"}
     }
 )
-def health_check():
+async def health_check():
     try:
-        with get_db() as db:
-            db.execute("SELECT 1")
+        async with get_async_db() as db:
+            await db.execute("SELECT 1")
     except Exception:
         raise HTTPException(status_code=400, detail="Health Check - DataBase Connection Failed")
     return format_response(200, "Health Check - Success")
+
+# Connection Pool Stats API
+@router.get(
+    "/pool",
+    response_model=DataResponse,
+    responses={
+        200: {"model": DataResponse, "description": "Connection pool statistics"},
+    }
+)
+def pool_health():
+    return format_response(200, "Connection Pool Stats", pool_stats())
+
+# Read Replica Stats API
+@router.get(
+    "/replicas",
+    response_model=DataResponse,
+    responses={
+        200: {
+            "model": DataResponse,
+            "description": (
+                "Read replica health, replication lag and connections in use"
+            ),
+        },
+    },
+)
+def replica_health():
+    return format_response(200, "Replica Stats", replica_router.stats_dict())
+
+# Password Hasher Stats API
+@router.get(
+    "/hasher",
+    response_model=DataResponse,
+    responses={
+        200: {
+            "model": DataResponse,
+            "description": "Password hashing worker pool statistics",
+        },
+    },
+)
+def hasher_health():
+    return format_response(200, "Password Hasher Stats", hasher_stats())
+
+# Auth Stats API
+@router.get(
+    "/auth",
+    response_model=DataResponse,
+    responses={
+        200: {
+            "model": DataResponse,
+            "description": "Verified token cache and revocation filter statistics",
+        },
+    },
+)
+def auth_health():
+    return format_response(200, "Auth Stats", auth_stats())
+
+# Cache Stats API
+@router.get(
+    "/cache",
+    response_model=DataResponse,
+    responses={
+        200: {
+            "model": DataResponse,
+            "description": "Cache hit/miss counters and Redis memory usage",
+        },
+    },
+)
+def cache_health():
+    return format_response(
+        200,
+        "Cache Stats",
+        {
+            "caches": cache_stats(),
+            "user_reads": user_access.stats_dict(),
+            "single_flight": single_flight_stats(),
+            "redis": redis_stats(r),
+            "client": redis_client_stats(),
+        },
+    )
+
+# Log Pipeline Stats API
+@router.get(
+    "/logging",
+    response_model=DataResponse,
+    responses={
+        200: {
+            "model": DataResponse,
+            "description": (
+                "Log queue depth, written/dropped lines and access log "
+                "sampling counters"
+            ),
+        },
+    },
+)
+def logging_health():
+    return format_response(
+        200,
+        "Log Pipeline Stats",
+        logging_stats() | {"access_log": access_log_sampler.stats_dict()},
+    )
+
+
+# Query Stats API
+@router.get(
+    "/queries",
+    dependencies=[Depends(query_health_enabled), Depends(get_current_user)],
+    response_model=DataResponse,
+    responses={
+        200: {
+            "model": DataResponse,
+            "description": (
+                "Top SQL statements by fingerprint with timings, rows and "
+                "calling routes"
+            ),
+        },
+        401: {"model": BaseResponse, "description": "Not authenticated"},
+        404: {"model": BaseResponse, "description": "HEALTH_QUERIES_ENABLED is off"},
+    },
+)
+def query_health(
+    limit: int = Query(20, ge=1, le=500, description=QUERY_STATS_LIMIT_DESC),
+    order: Literal["total_ms", "mean_ms", "max_ms", "calls", "rows"] = Query(
+        "total_ms", description=QUERY_STATS_ORDER_DESC
+    ),
+):
+    return format_response(
+        200,
+        "Query Stats",
+        query_stats.snapshot(limit, order) | {"compile_cache": compile_cache_stats()},
+    )
+
+
+# Reset Query Stats API
+@router.delete(
+    "/queries",
+    dependencies=[Depends(query_health_enabled), Depends(get_current_user)],
+    response_model=BaseResponse,
+    responses={
+        200: {"model": BaseResponse, "description": "Query statistics cleared"},
+        401: {"model": BaseResponse, "description": "Not authenticated"},
+        404: {"model": BaseResponse, "description": "HEALTH_QUERIES_ENABLED is off"},
+    }
+)
+def reset_query_health():
+    query_stats.reset()
+    return format_response(200, "Query Stats reset")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_metrics
+from app.db.session import observe_pool_metrics
+
+router = APIRouter()
+
+
+# Prometheus scrape endpoint
+@router.get("", response_class=Response)
+def metrics():
+    # Pool gauges of this worker are refreshed right away, the other workers
+    # refresh theirs on their own schedule
+    observe_pool_metrics()
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
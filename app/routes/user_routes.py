@@ -1,31 +1,61 @@
 
-from fastapi import APIRouter, Depends
-
-from app.schemas.response import DataResponse
-from app.schemas.user import UserCreate, UserQueryParams, UserUpdate
-from app.services import user_service
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+
+from app.schemas.response import FastJSONResponse
+from app.schemas.user import (
+    UserBatchResponse,
+    UserCreate,
+    UserExportParams,
+    UserListResponse,
+    UserQueryParams,
+    UserUpdate,
+)
+from app.services import import_service, user_service
+from app.shared.constants import BATCH_IDS_DESC, IMPORT_FILE_DESC, IMPORT_FORMAT_DESC
 
 router = APIRouter()
 
-@router.get("", response_model=DataResponse) 
-def list_users(query_params: UserQueryParams = Depends()):
-    return user_service.list_users(query_params)
+@router.get("", response_model=UserListResponse, response_class=FastJSONResponse)
+async def list_users(query_params: Annotated[UserQueryParams, Depends()]):
+    return await user_service.list_users(query_params)
+
+# Declared before /{user_id} so "export" and "batch" are not parsed as ids
+@router.get("/export")
+async def export_users(params: Annotated[UserExportParams, Depends()]):
+    return await user_service.export_users(params)
+
+@router.get(
+    "/batch", response_model=UserBatchResponse, response_class=FastJSONResponse
+)
+async def read_users(ids: Annotated[list[int], Query(description=BATCH_IDS_DESC)]):
+    return await user_service.read_users(ids)
 
-@router.get("/{user_id}")
-def read_user(user_id: int):
-    return user_service.read_user(user_id)
+@router.get("/{user_id}", response_class=FastJSONResponse)
+async def read_user(user_id: int):
+    return await user_service.read_user(user_id)
 
 @router.post("")
-def create_user(user: UserCreate):
-    return user_service.create_user(user)
+async def create_user(user: UserCreate):
+    return await user_service.create_user(user)
+
+@router.post("/import")
+async def import_users(
+    file: Annotated[UploadFile, File(description=IMPORT_FILE_DESC)],
+    format: Annotated[
+        Literal["ndjson", "csv"] | None, Query(description=IMPORT_FORMAT_DESC)
+    ] = None,
+):
+    return await import_service.import_upload(file, format)
 
 @router.patch("/{user_id}")
-def update_user(user_id: int, user_update: UserUpdate):
-    return user_service.update_user(user_id, user_update)
+async def update_user(user_id: int, user_update: UserUpdate):
+    return await user_service.update_user(user_id, user_update)
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int):
-    return user_service.delete_user(user_id)
+async def delete_user(user_id: int):
+    return await user_service.delete_user(user_id)
 
 
 
@@ -1,8 +1,10 @@
 from typing import Any
 
+import orjson
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
-from app.shared.constants import RESPONSE_500
+from app.shared.constants import NEXT_CURSOR_DESC, RESPONSE_500
 
 
 class BaseResponse(BaseModel):
@@ -12,7 +14,40 @@ class BaseResponse(BaseModel):
 class DataResponse(BaseResponse):
     data: Any = Field(..., description="Relavant Data in accordance with request")
 
+class PaginatedResponse(DataResponse):
+    next_cursor: str | None = Field(None, description=NEXT_CURSOR_DESC)
+
 def format_response(code : int = 500, message: str = RESPONSE_500, data: Any = None) -> BaseResponse | DataResponse:
     if data is not None:
         return DataResponse(code=code, msg=message, data=data)
     return BaseResponse(code=code, msg=message)
+
+def format_paginated_response(
+    code: int, message: str, data: Any, next_cursor: str | None = None
+) -> PaginatedResponse:
+    return PaginatedResponse(code=code, msg=message, data=data, next_cursor=next_cursor)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON rendered straight to bytes by orjson. Handles the records from
+    app.db.rows natively, so list endpoints skip building a pydantic model
+    per row; the route's response_model still documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+def format_json_response(
+    code: int = 500, message: str = RESPONSE_500, data: Any = None
+) -> FastJSONResponse:
+    # Same body as format_response(), without the pydantic round trip
+    if data is not None:
+        return FastJSONResponse({"code": code, "msg": message, "data": data})
+    return FastJSONResponse({"code": code, "msg": message})
+
+def format_paginated_json_response(
+    code: int, message: str, data: Any, next_cursor: str | None = None
+) -> FastJSONResponse:
+    return FastJSONResponse(
+        {"code": code, "msg": message, "data": data, "next_cursor": next_cursor}
+    )
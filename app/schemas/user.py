@@ -2,10 +2,15 @@ from typing import Literal
 
 from pydantic import BaseModel, EmailStr, Field, conint, constr
 
+from app.schemas.response import DataResponse, PaginatedResponse
 from app.shared.constants import (
+    BATCH_NOT_FOUND_DESC,
+    CURSOR_DESC,
     EMAIL_DESC,
     EMAIL_EXAMPLE,
     EMAIL_MISSING_ERROR,
+    EXPORT_FORMAT_DESC,
+    EXPORT_LIMIT_DESC,
     FIRST_NAME_DESC,
     FIRST_NAME_EXAMPLE,
     INVALID_EMAIL_ERROR,
@@ -15,6 +20,7 @@ from app.shared.constants import (
     LIMIT_EXAMPLE,
     OFFSET_DESC,
     OFFSET_EXAMPLE,
+    PAGINATION_DESC,
     PASSWORD_DESC,
     PASSWORD_EXAMPLE,
     PASSWORD_LENGTH_ERROR,
@@ -28,11 +34,18 @@ from app.shared.constants import (
 class UserModel(BaseModel):
     user_id: int
     email: str
-    password: str
     first_name: str
     last_name: str
+    full_name: str | None = None
     isactive: bool
 
+class UserListResponse(PaginatedResponse):
+    data: list[UserModel]
+
+class UserBatchResponse(DataResponse):
+    data: list[UserModel | None]
+    not_found: list[int] = Field(default_factory=list, description=BATCH_NOT_FOUND_DESC)
+
 class UserCreate(BaseModel):
     email: EmailStr = Field(...,
                             description=EMAIL_DESC,
@@ -63,3 +76,32 @@ class UserQueryParams(BaseModel):
     offset: conint(ge=0) | None = Field(None, description=OFFSET_DESC, example=OFFSET_EXAMPLE)
     search: str | None = Field(None, description=SEARCH_DESC)
     sort: Literal["ASC", "DESC"] | None = Field(None, description=SORT_DESC, example=SORT_EXAMPLE)
+    pagination: Literal["offset", "cursor"] | None = Field(
+        None, description=PAGINATION_DESC
+    )
+    cursor: str | None = Field(None, description=CURSOR_DESC)
+
+class UserExportParams(BaseModel):
+    format: Literal["ndjson", "csv"] = Field("ndjson", description=EXPORT_FORMAT_DESC)
+    search: str | None = Field(None, description=SEARCH_DESC)
+    sort: Literal["ASC", "DESC"] | None = Field(
+        None, description=SORT_DESC, example=SORT_EXAMPLE
+    )
+    limit: conint(gt=0) | None = Field(None, description=EXPORT_LIMIT_DESC)
+
+class UserImportError(BaseModel):
+    row: int = Field(
+        ..., description="Line (NDJSON) or record (CSV) number in the uploaded file"
+    )
+    email: str | None = None
+    error: str
+
+class UserImportResult(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    errors: list[UserImportError] = Field(
+        default_factory=list,
+        description="Duplicate and failed rows, capped at the first 1000",
+    )
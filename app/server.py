@@ -0,0 +1,237 @@
+"""
+Production entry point::
+
+    python -m app.server
+
+Binds the listening socket once, then forks WORKERS uvicorn workers that
+share it and replaces any that exit: after SERVER_MAX_REQUESTS requests,
+or if one crashes. SIGTERM or SIGINT stops new connections and gives
+in-flight requests SERVER_GRACEFUL_TIMEOUT seconds to finish. Migrations
+run once here, before any worker starts. With RELOAD=True it runs a single
+reloading development server instead.
+"""
+
+import os
+import random
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from contextlib import suppress
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+from app.db.migration import migration
+
+logger = get_logger(__name__)
+
+APP_PATH = "app.main:app"
+# uvicorn's exit code when the lifespan startup failed
+STARTUP_FAILURE = 3
+# Extra seconds on top of SERVER_GRACEFUL_TIMEOUT before workers are killed
+KILL_GRACE = 5.0
+
+
+def worker_count() -> int:
+    if settings.WORKERS > 0:
+        return settings.WORKERS
+    # CPUs this process may run on, which respects container cpusets
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def uvicorn_config(app) -> uvicorn.Config:
+    max_requests = settings.SERVER_MAX_REQUESTS
+    if max_requests:
+        # Spread recycling so workers do not all restart at once
+        max_requests += random.randint(0, settings.SERVER_MAX_REQUESTS_JITTER)
+    return uvicorn.Config(
+        app,
+        host=settings.HOST,
+        port=settings.PORT,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        limit_max_requests=max_requests or None,
+        # Logging is configured by the app, not by uvicorn
+        log_config=None,
+    )
+
+
+def default_multiprocess_dir(workers: int) -> str | None:
+    """
+    Without PROMETHEUS_MULTIPROC_DIR every worker would serve only its own
+    samples on /metrics. With several workers and none set, create a temp
+    directory and export it to them. Returns the directory if created.
+
+    Must run before prometheus_client is imported, which picks single or
+    multiprocess mode once, at import.
+    """
+    if workers <= 1 or os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return None
+    directory = tempfile.mkdtemp(prefix="prometheus-")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    logger.warning(
+        "PROMETHEUS_MULTIPROC_DIR is not set, using a temporary directory",
+        directory=directory,
+        workers=workers,
+    )
+    return directory
+
+
+def reset_multiprocess_metrics() -> None:
+    # Samples left over from a previous run would be summed into /metrics
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+class Supervisor:
+    """
+    Forks and watches the worker processes.
+
+    With `preload` the app is imported once here and the workers are forked
+    from it, sharing its memory pages and skipping the import; otherwise
+    every worker imports the app itself.
+    """
+
+    def __init__(self, workers: int, preload: bool):
+        self.workers = workers
+        self.preload = preload
+        self.app = None
+        self.socket = None
+        self.metrics_dir: str | None = None
+        self.children: set[int] = set()
+        self.stopping = False
+        self.exit_code = 0
+
+    def prepare(self) -> None:
+        self.metrics_dir = default_multiprocess_dir(self.workers)
+        reset_multiprocess_metrics()
+        if settings.MIGRATION:
+            migration()
+        # Workers must not run the migrations again
+        settings.MIGRATION = False
+
+        if self.preload:
+            # Importing opens no connections, nothing is shared with the workers.
+            # Only imported here: without preload the master never loads the app.
+            from app.main import app  # noqa: PLC0415
+
+            self.app = app
+        self.socket = uvicorn_config(APP_PATH).bind_socket()
+
+    def spawn(self) -> None:
+        # The log writer thread does not survive fork, stop it around the fork
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        setup_logging()
+        self.children.add(pid)
+
+    def _run_worker(self) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        setup_logging()
+        server = None
+        try:
+            server = uvicorn.Server(uvicorn_config(self.app or APP_PATH))
+            server.run(sockets=[self.socket])
+        finally:
+            # Import errors and a failed lifespan startup must not be retried forever
+            code = 0 if server is not None and server.started else STARTUP_FAILURE
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def stop(self, sig, frame) -> None:
+        self.stopping = True
+
+    def reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            self.children.discard(pid)
+            self._mark_dead(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+            if code == STARTUP_FAILURE:
+                logger.error("Worker failed to start, shutting down", pid=pid)
+                self.stopping, self.exit_code = True, 1
+                continue
+            # Exit code 0 is a worker that reached SERVER_MAX_REQUESTS
+            logger.info("Worker exited, starting a new one", pid=pid, exit_code=code)
+            self.spawn()
+
+    @staticmethod
+    def _mark_dead(pid: int) -> None:
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # Imported late so default_multiprocess_dir() runs first
+            from prometheus_client import multiprocess  # noqa: PLC0415
+
+            multiprocess.mark_process_dead(pid)
+
+    def run(self) -> int:
+        self.prepare()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.stop)
+        logger.info(
+            "Starting workers",
+            workers=self.workers,
+            preload=self.preload,
+            address=f"{settings.HOST}:{settings.PORT}",
+        )
+        for _ in range(self.workers):
+            self.spawn()
+        while not self.stopping:
+            self.reap()
+            time.sleep(0.5)
+        self.shutdown()
+        return self.exit_code
+
+    def shutdown(self) -> None:
+        logger.info("Stopping workers", workers=len(self.children))
+        for pid in self.children:
+            with suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT + KILL_GRACE
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logger.warning("Worker did not stop in time, killing it", pid=pid)
+            with suppress(ProcessLookupError, ChildProcessError):
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            self._mark_dead(pid)
+        self.children.clear()
+        self.socket.close()
+        if self.metrics_dir is not None:
+            shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        shutdown_logging()
+
+
+def main() -> None:
+    if settings.RELOAD:
+        uvicorn.run(APP_PATH, host=settings.HOST, port=settings.PORT, reload=True)
+        return
+    setup_logging()
+    sys.exit(Supervisor(worker_count(), settings.SERVER_PRELOAD).run())
+
+
+if __name__ == "__main__":
+    main()
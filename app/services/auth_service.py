@@ -1,44 +1,95 @@
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException
 
-from app.db.session import get_db
-from app.schemas.auth import *
+from app.core.logging import get_logger
+from app.core.security import revocations
+from app.db.query_builder import QueryBuilder
+from app.db.session import recent_writes
+from app.schemas.auth import LoginRequest, SignUpRequest
 from app.schemas.response import format_response
 from app.utlis.generateJwt import create_jwt_token
-from app.utlis.verifyPwd import hash_password, verify_password
-from app.core.logging import get_logger
+from app.utlis.verifyPwd import hash_password_async, needs_rehash, verify_password_async
 
 logger = get_logger(__name__)
 
-async def login(loginRequest:LoginRequest):
-    with get_db() as cursor:
-        query = "SELECT * FROM users WHERE email = %s;"
-        cursor.execute(query, (loginRequest.email,))
-        user = cursor.fetchone()
-        print(user)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        if not verify_password(loginRequest.password, user["password"]):
-            raise HTTPException(status_code=400, detail="Invalid Password")
-        data={"userId": user["user_id"],"firstName":user["first_name"],"lastName":user["last_name"]}
-        token = create_jwt_token(data)
-        return format_response(200, "Login Successfully",token)
+async def login(loginRequest:LoginRequest, background_tasks: BackgroundTasks):
+    # Release the connection before bcrypt runs
+    query = (
+        QueryBuilder("users")
+        .select("user_id", "password", "first_name", "last_name")
+        .where(email=loginRequest.email)
+    )
+    user = await query.fetch_one(read_only=True, sticky=f"email:{loginRequest.email}")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not await verify_password_async(loginRequest.password, user["password"]):
+        raise HTTPException(status_code=400, detail="Invalid Password")
+    if needs_rehash(user["password"]):
+        # Runs after the response is sent, the token does not wait for bcrypt
+        background_tasks.add_task(
+            _rehash_password, user["user_id"], user["password"], loginRequest.password
+        )
+    data = {
+        "userId": user["user_id"],
+        "firstName": user["first_name"],
+        "lastName": user["last_name"],
+    }
+    token = create_jwt_token(data)
+    return format_response(200, "Login Successfully",token)
+
+async def _rehash_password(user_id: int, old_hash: str, password: str):
+    # Best effort: a failed upgrade must not fail the login
+    try:
+        new_hash = await hash_password_async(password)
+        # Skipped if the password changed in the meantime
+        await (
+            QueryBuilder("users")
+            .update(password=new_hash)
+            .where(user_id=user_id, password=old_hash)
+            .execute()
+        )
+    except Exception as e:
+        logger.warning("Password rehash failed", user_id=user_id, error=str(e))
 
 async def signup(userData: SignUpRequest):
-    with get_db() as cursor:
-        try:
-            query = "SELECT * FROM users WHERE email = %s;"
-            cursor.execute(query, (userData.email,))
-            user = cursor.fetchone()
-            if user:
-                raise HTTPException(status_code=409, detail="User Already Exists")
-            hashed_password = hash_password(userData.password)
-            query = """INSERT INTO users (email, password, first_name, last_name) 
-                        VALUES (%s, %s, %s, %s) RETURNING user_id;"""
-            cursor.execute(query, (userData.email, hashed_password, userData.first_name, userData.last_name))
-            
-            return format_response(200, "Account has been created successfully")
-        
-        except Exception as e:
-            logger.error("Error creating new user", error=str(e))
-            return format_response(500, "Error creating new user")
+    try:
+        user = (
+            await QueryBuilder("users")
+            .select("user_id")
+            .where(email=userData.email)
+            .fetch_one()
+        )
+        if user:
+            raise HTTPException(status_code=409, detail="User Already Exists")
+        hashed_password = await hash_password_async(userData.password)
+        await (
+            QueryBuilder("users")
+            .insert(
+                email=userData.email,
+                password=hashed_password,
+                first_name=userData.first_name,
+                last_name=userData.last_name,
+            )
+            .execute()
+        )
+        # A login right after signup must find the new row
+        await recent_writes.mark(f"email:{userData.email}")
+
+        return format_response(200, "Account has been created successfully")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error creating new user", error=str(e))
+        return format_response(500, "Error creating new user")
+
 
+async def logout(claims: dict):
+    # Tokens issued before jti was added cannot be revoked, they expire on their own
+    if "jti" not in claims:
+        raise HTTPException(status_code=400, detail="Token cannot be revoked")
+    try:
+        await revocations.revoke(claims["jti"], claims["exp"])
+    except Exception as e:
+        logger.error("Error revoking token", error=str(e))
+        return format_response(500, "Error revoking token")
+    return format_response(200, "Logged out successfully")
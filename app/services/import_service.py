@@ -0,0 +1,220 @@
+import asyncio
+import csv
+import io
+import json
+from collections.abc import Iterator
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.query_builder import QueryBuilder
+from app.db.session import recent_writes
+from app.schemas.response import format_response
+from app.schemas.user import UserCreate, UserImportError, UserImportResult
+from app.services.user_service import (
+    LIST_VERSION,
+    fetch_user_page,
+    user_cache,
+    user_list_cache,
+)
+from app.utlis.verifyPwd import hash_password_async
+
+logger = get_logger(__name__)
+
+MAX_REPORTED_ERRORS = 1000
+INSERT_COLUMNS = ("email", "password", "first_name", "last_name")
+
+
+def read_rows(
+    file: BinaryIO, format: str
+) -> Iterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (row number, raw row, parse error) for every record in the file.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row, None
+        return
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield row_number, row, None
+        else:
+            yield row_number, None, "Expected a JSON object"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+
+class _Importer:
+    def __init__(self):
+        self.result = UserImportResult()
+        # Imports leave hasher capacity for concurrent logins and never trip
+        # its queue limit
+        self._hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+    def _reject(
+        self, row_number: int, email: str | None, error: str, duplicate: bool = False
+    ) -> None:
+        if duplicate:
+            self.result.duplicates += 1
+        else:
+            self.result.failed += 1
+        if len(self.result.errors) < MAX_REPORTED_ERRORS:
+            self.result.errors.append(
+                UserImportError(row=row_number, email=email, error=error)
+            )
+
+    async def _hash(self, password: str) -> str:
+        async with self._hash_slots:
+            return await hash_password_async(password)
+
+    def _next_batch(
+        self, rows: Iterator[tuple[int, dict | None, str | None]]
+    ) -> tuple[list[tuple[int, UserCreate]], bool]:
+        """
+        Read and validate rows until IMPORT_BATCH_SIZE are valid. Returns the
+        batch and whether the file is exhausted. Runs in a worker thread.
+        """
+        batch: list[tuple[int, UserCreate]] = []
+        for row_number, row, error in rows:
+            self.result.total += 1
+            if error:
+                self._reject(row_number, None, error)
+                continue
+            try:
+                batch.append((row_number, UserCreate.model_validate(row)))
+            except ValidationError as e:
+                self._reject(row_number, row.get("email"), _validation_message(e))
+                continue
+            if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                return batch, False
+        return batch, True
+
+    async def run(
+        self, rows: Iterator[tuple[int, dict | None, str | None]]
+    ) -> UserImportResult:
+        done = False
+        while not done:
+            # Reading, parsing and validating are blocking work, keep them off the loop
+            batch, done = await run_in_threadpool(self._next_batch, rows)
+            if batch:
+                await self._import_batch(batch)
+        return self.result
+
+    async def _import_batch(self, batch: list[tuple[int, UserCreate]]) -> None:
+        # Drop known and repeated emails before spending bcrypt time on them
+        query = (
+            QueryBuilder("users")
+            .select("email")
+            .where("email", "IN", [user.email for _, user in batch])
+        )
+        seen = {row["email"] for row in await query.fetch_all()}
+        fresh = []
+        for row_number, user in batch:
+            if user.email in seen:
+                self._reject(
+                    row_number, user.email, "Email already exists", duplicate=True
+                )
+            else:
+                seen.add(user.email)
+                fresh.append((row_number, user))
+        if not fresh:
+            return
+
+        hashes = await asyncio.gather(
+            *(self._hash(user.password) for _, user in fresh),
+            return_exceptions=True,
+        )
+        values = []
+        for (row_number, user), hashed in zip(fresh, hashes, strict=True):
+            if isinstance(hashed, BaseException):
+                self._reject(
+                    row_number, user.email, f"Password hashing failed: {hashed}"
+                )
+            else:
+                values.append(
+                    (row_number, (user.email, hashed, user.first_name, user.last_name))
+                )
+        if not values:
+            return
+
+        try:
+            await self._insert(values)
+        except Exception as e:
+            # Find the offending rows instead of failing everyone in the batch
+            logger.warning(
+                "Bulk insert failed, retrying row by row",
+                rows=len(values),
+                error=str(e),
+            )
+            for value in values:
+                try:
+                    await self._insert([value])
+                except Exception as row_error:
+                    self._reject(value[0], value[1][0], str(row_error))
+
+    async def _insert(self, values: list[tuple[int, tuple]]) -> None:
+        # Emails inserted concurrently by someone else since the check above are skipped
+        query = (
+            QueryBuilder("users")
+            .insert_many(INSERT_COLUMNS, [row for _, row in values])
+            .on_conflict_do_nothing("email")
+            .returning("user_id", "email")
+        )
+        inserted = await query.fetch_all()
+
+        inserted_emails = {row["email"] for row in inserted}
+        self.result.inserted += len(inserted)
+        for row_number, row in values:
+            if row[0] not in inserted_emails:
+                self._reject(row_number, row[0], "Email already exists", duplicate=True)
+        # Drop cached "not found" entries for the new ids
+        await user_cache.invalidate_many([str(row["user_id"]) for row in inserted])
+        await recent_writes.mark(
+            *(f"email:{row['email']}" for row in inserted),
+            *(f"user:{row['user_id']}" for row in inserted),
+        )
+
+
+async def import_users(file: BinaryIO, format: str) -> UserImportResult:
+    """
+    Validate, hash and insert every user in an NDJSON or CSV file.
+
+    Rows are processed IMPORT_BATCH_SIZE at a time; invalid rows and
+    duplicate emails are reported without stopping the import.
+    """
+    try:
+        return await _Importer().run(read_rows(file, format))
+    finally:
+        await user_list_cache.invalidate(LIST_VERSION)
+        fetch_user_page.flight.forget()
+
+
+def guess_format(filename: str | None) -> str:
+    return "csv" if filename and filename.lower().endswith(".csv") else "ndjson"
+
+
+async def import_upload(file: UploadFile, format: str | None = None):
+    try:
+        result = await import_users(file.file, format or guess_format(file.filename))
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Batches before the unreadable part are already committed
+        raise HTTPException(status_code=400, detail=f"Unreadable file: {e}") from e
+    return format_response(
+        200, f"Imported {result.inserted} of {result.total} users", result.model_dump()
+    )
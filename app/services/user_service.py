@@ -1,116 +1,365 @@
+import base64
+import binascii
+import csv
+import hashlib
+import io
 import json
+import re
 
 from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
 
-from app.db.session import get_db
-from app.redis.redis_instance import r
-from app.schemas.response import format_response
-from app.schemas.user import *
-
-
-def list_users(query_params: UserQueryParams):
-    with get_db() as cursor:
-        limit = query_params.limit or 10
-        offset = query_params.offset or 0
-        search = query_params.search 
-        sort = query_params.sort or "ASC"
-        
-        query = "SELECT * FROM users"
-        conditions = []
-        params = []
-        
-        if search:
-            conditions.append("first_name LIKE %s")
-            params.append(f"%{search}%")
-            
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-            
-        if sort and sort.lower() == "asc":
-            query += " ORDER BY first_name ASC"
-        elif sort and sort.lower() == "desc":
-            query += " ORDER BY first_name DESC"
-        
-        if limit:
-            query += " LIMIT %s"
-            params.append(limit)
-        
-        if offset:
-            query += " OFFSET %s"
-            params.append(offset)
-
-        try:
-            cursor.execute(query, params)
-            users = cursor.fetchall()
-            users_data = [UserModel(**user) for user in users]
-        except Exception as e:
-            return format_response(500, str(e))
-        return format_response(200, "Users fetched Successfully", users_data)
-
-def read_user(user_id: int):
-    with get_db() as cursor:
-        cached_user = r.get(f"user:{user_id}")
-        if cached_user:
-            return format_response(200, "User fetched from cache", json.loads(cached_user.decode("utf-8")))
-        try:
-            query = "SELECT * FROM users WHERE user_id = %s;"
-            cursor.execute(query, (user_id,))
-            user_row = cursor.fetchone()
-            if not user_row:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Convert tuple to dictionary
-            column_names = [desc[0] for desc in cursor.description]
-            user = dict(zip(column_names, user_row, strict=False))
-            
-            r.set(f"user:{user_id}", json.dumps(user))
-        except Exception as error:
-            return format_response(500, str(error))
-        return format_response(200, "User details fetched Successfully", user)
-
-def create_user(user: UserCreate):
-    with get_db() as cursor:
-        try:
-            query = """INSERT INTO users (email, password, first_name, last_name) 
-                       VALUES (%s, %s, %s, %s) RETURNING user_id;"""
-            cursor.execute(query, (user.email, user.password, user.first_name, user.last_name))
-        except Exception as error:
-            return format_response(500, str(error))
-        return format_response(201, "User inserted Successfully")
-
-def update_user(user_id: int, user_update: UserUpdate):
-    with get_db() as cursor:
-        try:
-            updates = []
-            params = []
+from app.core.config import settings
+from app.db.query_builder import QueryBuilder, Raw
+from app.db.session import recent_writes
+from app.redis.access_tracker import AccessTracker
+from app.redis.cache import RedisCache
+from app.redis.local_cache import LocalCache
+from app.redis.redis_instance import ar
+from app.schemas.response import (
+    FastJSONResponse,
+    format_json_response,
+    format_paginated_json_response,
+    format_response,
+)
+from app.schemas.user import (
+    UserCreate,
+    UserExportParams,
+    UserModel,
+    UserQueryParams,
+    UserUpdate,
+)
+from app.utlis.singleFlight import call_key, single_flight
+from app.utlis.verifyPwd import hash_password_async
+
+cache_client = ar if settings.CACHE_REDIS_ENABLED else None
+
+user_cache = RedisCache(
+    cache_client,
+    prefix="user",
+    ttl=settings.CACHE_TTL,
+    namespace=settings.CACHE_NAMESPACE,
+    ttl_jitter=settings.CACHE_TTL_JITTER,
+    negative_ttl=settings.CACHE_NEGATIVE_TTL,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT,
+    lock_wait=settings.CACHE_LOCK_WAIT,
+    local=LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_TTL)
+    if settings.CACHE_L1_ENABLED
+    else None,
+)
+user_list_cache = RedisCache(
+    cache_client,
+    prefix="users:list",
+    ttl=settings.CACHE_LIST_TTL,
+    namespace=settings.CACHE_NAMESPACE,
+    ttl_jitter=settings.CACHE_TTL_JITTER,
+    negative_ttl=settings.CACHE_NEGATIVE_TTL,
+    lock_timeout=settings.CACHE_LOCK_TIMEOUT,
+    lock_wait=settings.CACHE_LOCK_WAIT,
+)
+# All listings share one version, any write invalidates every page
+LIST_VERSION = "all"
+# Most-read user ids, warmed into user_cache at startup
+user_access = AccessTracker(
+    ar if settings.CACHE_REDIS_ENABLED else None,
+    key="user:reads",
+    capacity=settings.CACHE_ACCESS_CAPACITY,
+    half_life=settings.CACHE_ACCESS_HALF_LIFE,
+)
+
+
+async def _invalidate_user(user_id: int, *written: str):
+    # Called after commit so readers cannot cache the pre-write row under the
+    # new version.
+    # Reads of the user stay on the primary until replicas have the write too.
+    # Listings are not pinned: they are versioned by LIST_VERSION instead.
+    await recent_writes.mark(f"user:{user_id}", *written)
+    await user_cache.invalidate(str(user_id))
+    await user_list_cache.invalidate(LIST_VERSION)
+    # Reads starting from now must not join one that began before the write
+    fetch_user.flight.forget(call_key(user_id))
+    fetch_user_page.flight.forget()
+
+
+# Fields of UserModel, which documents every user response. Password hashes
+# are only read by the login lookup; search_vector is only for filtering.
+USER_COLUMNS = tuple(UserModel.model_fields)
+
+def search_tsquery(search: str) -> str | None:
+    """
+    Turn free text into a prefix tsquery, e.g. "Jo smi" -> "jo:* & smi:*".
+    """
+    words = re.findall(r"\w+", search.lower())
+    return " & ".join(f"{word}:*" for word in words) or None
+
+def _matches(tsquery: str) -> Raw:
+    return Raw("search_vector @@ to_tsquery('simple', %s)", tsquery)
+
+def _rank(tsquery: str) -> Raw:
+    return Raw("ts_rank(search_vector, to_tsquery('simple', %s))", tsquery)
+
+def _encode_cursor(sort: str, row) -> str:
+    payload = json.dumps([sort, row.first_name, row.user_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple[str, str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, first_name, user_id = json.loads(base64.urlsafe_b64decode(padded))
+        if (
+            sort not in ("ASC", "DESC")
+            or not isinstance(first_name, str)
+            or not isinstance(user_id, int)
+        ):
+            raise ValueError
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    return sort, first_name, user_id
+
+async def list_users(query_params: UserQueryParams):
+    limit = query_params.limit or 10
+    offset = query_params.offset or 0
+    search = query_params.search
+    sort = query_params.sort or "ASC"
+    keyset = query_params.pagination == "cursor" or query_params.cursor is not None
+
+    query = QueryBuilder("users").select(*USER_COLUMNS)
+
+    tsquery = search_tsquery(search) if search else None
+    if tsquery:
+        # Answered from the ix_users_search_vector GIN index
+        query = query.where(_matches(tsquery))
+
+    after = None
+    if query_params.cursor:
+        # The cursor carries its own direction so pages stay consistent
+        sort, after_first_name, after_id = _decode_cursor(query_params.cursor)
+        after = (after_first_name, after_id)
+
+    # Relevance order unless the caller asked for a sort or pages by cursor
+    if tsquery and not query_params.sort and not keyset:
+        query = query.order_by(_rank(tsquery), descending=True).order_by("user_id")
+    else:
+        # Row comparison and order are answered from ix_users_first_name_user_id;
+        # user_id breaks ties between equal first names so ordering is stable
+        query = query.keyset(
+            ("first_name", "user_id"), after, descending=sort.lower() == "desc"
+        )
+
+    # One extra row tells whether there is a next page
+    query = query.limit(limit + 1 if keyset else limit)
+    if offset and not keyset:
+        query = query.offset(offset)
+
+    async def load():
+        # Records straight from tuple rows; the columns already match UserModel
+        users = await query.fetch_records(read_only=True)
+        next_cursor = None
+        if keyset and len(users) > limit:
+            users = users[:limit]
+            next_cursor = _encode_cursor(sort, users[-1])
+        return {"users": users, "next_cursor": next_cursor}
+
+    # A keyset page of `limit` runs the same SQL as an offset page of `limit + 1`
+    cache_key = hashlib.sha1(
+        json.dumps([keyset, *query.compile()]).encode()
+    ).hexdigest()
+    try:
+        page, _ = await fetch_user_page(cache_key, load)
+    except Exception as e:
+        return format_json_response(500, str(e))
+    return format_paginated_json_response(
+        200, "Users fetched Successfully", page["users"], page["next_cursor"]
+    )
+
+
+# Pages are coalesced by the SQL they run, however the parameters were spelled
+@single_flight("list_users", key=lambda cache_key, load: cache_key)
+async def fetch_user_page(cache_key: str, load) -> tuple[dict, bool]:
+    return await user_list_cache.get_or_load(cache_key, load, version_key=LIST_VERSION)
+
+def _ndjson_chunk(rows: list[dict]) -> str:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+def _csv_chunk(rows: list[dict], header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(USER_COLUMNS)
+    writer.writerows([row[column] for column in USER_COLUMNS] for row in rows)
+    return buffer.getvalue()
+
+async def export_users(params: UserExportParams):
+    query = QueryBuilder("users").select(*USER_COLUMNS).limit(params.limit)
+
+    tsquery = search_tsquery(params.search) if params.search else None
+    if tsquery:
+        query = query.where(_matches(tsquery))
+
+    # Both orders walk an index, so rows start flowing without a full sort
+    if params.sort:
+        query = query.order_by(
+            "first_name", "user_id", descending=params.sort == "DESC"
+        )
+    else:
+        query = query.order_by("user_id")
+
+    batches = query.stream(settings.EXPORT_BATCH_SIZE)
+    # Run the query before the 200 goes out so pool and query errors get a real status
+    first_batch = await anext(batches, [])
+
+    async def body():
+        if params.format == "csv":
+            yield _csv_chunk(first_batch, header=True)
+            async for rows in batches:
+                yield _csv_chunk(rows)
+        else:
+            yield _ndjson_chunk(first_batch)
+            async for rows in batches:
+                yield _ndjson_chunk(rows)
+
+    if params.format == "csv":
+        media_type, filename = "text/csv", "users.csv"
+    else:
+        media_type, filename = "application/x-ndjson", "users.ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+async def _load_user(user_id: int):
+    query = QueryBuilder("users").select(*USER_COLUMNS).where(user_id=user_id)
+    return await query.fetch_record(read_only=True, sticky=f"user:{user_id}")
+
+async def _load_users(keys: list[str], read_only: bool = False) -> dict:
+    query = (
+        QueryBuilder("users")
+        .select(*USER_COLUMNS)
+        .where("user_id", "IN", [int(key) for key in keys])
+    )
+    # Only a recent write to one of these users keeps the batch on the primary
+    if read_only and await recent_writes.recent(*(f"user:{key}" for key in keys)):
+        read_only = False
+    users = await query.fetch_records(read_only=read_only)
+    return {str(user.user_id): user for user in users}
+
+async def _load_users_read_only(keys: list[str]) -> dict:
+    return await _load_users(keys, read_only=True)
+
+async def warm_user_cache(size: int) -> int:
+    """
+    Cache the `size` most-read users that are not cached yet, in one query.
+    """
+    # The primary: replicas may lag behind writes made while this worker was down
+    return await user_cache.warm(await user_access.top(size), _load_users)
+
+async def read_user(user_id: int):
+    # Counted per request, coalesced or not
+    user_access.record(str(user_id))
+    try:
+        user, cached = await fetch_user(user_id)
+    except Exception as error:
+        return format_json_response(500, str(error))
+    # Each caller gets its own response, only the loaded user is shared
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if cached:
+        return format_json_response(200, "User fetched from cache", user)
+    return format_json_response(200, "User details fetched Successfully", user)
+
+@single_flight("read_user")
+async def fetch_user(user_id: int):
+    return await user_cache.get_or_load(str(user_id), lambda: _load_user(user_id))
+
+async def read_users(user_ids: list[int]):
+    """
+    Many users in one call: cached ones in one Redis round trip, the rest
+    with one query. Results keep the requested order, null where no user exists.
+    """
+    if len(user_ids) > settings.USER_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.USER_BATCH_MAX_IDS} ids per batch",
+        )
+    for user_id in user_ids:
+        user_access.record(str(user_id))
+    try:
+        users = await user_cache.get_many_or_load(
+            [str(user_id) for user_id in user_ids], _load_users_read_only
+        )
+    except Exception as error:
+        return format_json_response(500, str(error))
+    data = [users[str(user_id)] for user_id in user_ids]
+    not_found = list(
+        dict.fromkeys(
+            user_id
+            for user_id, user in zip(user_ids, data, strict=True)
+            if user is None
+        )
+    )
+    return FastJSONResponse(
+        {
+            "code": 200,
+            "msg": "Users fetched Successfully",
+            "data": data,
+            "not_found": not_found,
+        }
+    )
+
+
+async def create_user(user: UserCreate):
+    try:
+        hashed_password = await hash_password_async(user.password)
+        query = (
+            QueryBuilder("users")
+            .insert(
+                email=user.email,
+                password=hashed_password,
+                first_name=user.first_name,
+                last_name=user.last_name,
+            )
+            .returning("user_id")
+        )
+        user_id = (await query.fetch_one())["user_id"]
+    except Exception as error:
+        return format_response(500, str(error))
+    # Drops a cached "not found" for the new id as well
+    await _invalidate_user(user_id, f"email:{user.email}")
+    return format_response(201, "User inserted Successfully")
+
+async def update_user(user_id: int, user_update: UserUpdate):
+    try:
+        # Only the fields that were sent are changed
+        updates = {
+            column: value
+            for column, value in (
+                ("email", user_update.email),
+                ("password", user_update.password),
+                ("first_name", user_update.first_name),
+                ("last_name", user_update.last_name),
+            )
+            if value
+        }
+        if "password" in updates:
+            updates["password"] = await hash_password_async(updates["password"])
+
+        if updates:
+            await (
+                QueryBuilder("users").update(**updates).where(user_id=user_id).execute()
+            )
             if user_update.email:
-                updates.append("email = %s")
-                params.append(user_update.email)
-            if user_update.password:
-                updates.append("password = %s")
-                params.append(user_update.password)
-            if user_update.first_name:
-                updates.append("first_name = %s")
-                params.append(user_update.first_name)
-            if user_update.last_name:
-                updates.append("last_name = %s")
-                params.append(user_update.last_name)
-            
-            if updates:
-                params.append(user_id)
-                query = f"UPDATE users SET {', '.join(updates)} WHERE user_id = %s;"
-                cursor.execute(query, params) 
-                r.delete(f"user:{user_id}")
-        except Exception as error:
-            return format_response(500, str(error))
-        return format_response(200, "User details updated successfully")
-
-def delete_user(user_id: int):
-    with get_db() as cursor:
-        try:
-            query = "DELETE FROM users WHERE user_id = %s;"
-            cursor.execute(query, (user_id,))
-            r.delete(f"user:{user_id}")  
-        except Exception as error:
-            return format_response(500, str(error))
-        return format_response(200, "User deleted Successfully")
+                await _invalidate_user(user_id, f"email:{user_update.email}")
+            else:
+                await _invalidate_user(user_id)
+    except Exception as error:
+        return format_response(500, str(error))
+    return format_response(200, "User details updated successfully")
+
+async def delete_user(user_id: int):
+    try:
+        await QueryBuilder("users").delete().where(user_id=user_id).execute()
+        await _invalidate_user(user_id)
+    except Exception as error:
+        return format_response(500, str(error))
+    return format_response(200, "User deleted Successfully")
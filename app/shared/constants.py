@@ -8,8 +8,44 @@ FIRST_NAME_DESC = "First name of the user."
 LAST_NAME_DESC = "Last name of the user."
 LIMIT_DESC = "Limit the number of returned users. Must be greater than 0."
 OFFSET_DESC = "Number of users to skip. Must be 0 or more."
-SEARCH_DESC = "Search term to filter users by."
+SEARCH_DESC = (
+    "Search terms matched case-insensitively as word prefixes of first name, last "
+    "name, full name and email. Results are ranked by relevance unless sort is given."
+)
 SORT_DESC = "Sort users either in ascending (ASC) or descending (DESC) order."
+PAGINATION_DESC = (
+    "Pagination mode: 'offset' (limit/offset) or 'cursor' (keyset, use next_cursor "
+    "for the next page)."
+)
+CURSOR_DESC = (
+    "Opaque cursor returned as next_cursor by the previous page. Implies cursor "
+    "pagination."
+)
+NEXT_CURSOR_DESC = (
+    "Cursor for the next page, null when there are no more results or in offset mode."
+)
+EXPORT_FORMAT_DESC = (
+    "Export format: newline-delimited JSON (ndjson) or CSV with a header row."
+)
+EXPORT_LIMIT_DESC = (
+    "Maximum number of users to export. Exports every matching user when omitted."
+)
+BATCH_IDS_DESC = (
+    "Ids of the users to fetch, repeated (ids=1&ids=2). Results are returned in this "
+    "order."
+)
+BATCH_NOT_FOUND_DESC = "Requested ids with no user; their entries in data are null."
+IMPORT_FILE_DESC = (
+    "NDJSON or CSV file with email, password, first_name and last_name for every "
+    "user."
+)
+IMPORT_FORMAT_DESC = (
+    "Format of the uploaded file. Guessed from the file name (.csv) when omitted."
+)
+QUERY_STATS_LIMIT_DESC = "Number of statements to return."
+QUERY_STATS_ORDER_DESC = (
+    "Rank statements by total time, mean time, max time, calls or rows."
+)
 TOKEN_DESC = "Verification Token"
 PASSWORD_RESET_TOKEN_DESC = "Password Reset Token"
 NEW_PASSWORD_DESC = "New Password"
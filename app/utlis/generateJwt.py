@@ -1,23 +1,46 @@
 import datetime
+import uuid
 
 import jwt
 from fastapi import HTTPException
 
-SECRET_KEY = "your-secret-key"
-ALGORITHM = "HS256"  
+from app.core.config import settings
+
+
+def signing_keys() -> dict[str, str]:
+    """
+    Secrets by key id. Tokens are signed with SECRET_KEY under JWT_KEY_ID;
+    JWT_PREVIOUS_KEYS stay valid for verification while a rotation is rolled out.
+    """
+    return {**settings.JWT_PREVIOUS_KEYS, settings.JWT_KEY_ID: settings.SECRET_KEY}
 
 def create_jwt_token(data: dict):
-    expiration = datetime.datetime.utcnow() + datetime.timedelta(hours=1) 
-    token = jwt.encode({"exp": expiration, **data}, SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.datetime.now(datetime.UTC)
+    expiration = now + datetime.timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # jti identifies the token in the revocation list
+    claims = {"exp": expiration, "iat": now, "jti": uuid.uuid4().hex, **data}
+    token = jwt.encode(
+        claims,
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+        headers={"kid": settings.JWT_KEY_ID},
+    )
     return token
 
 def verify_jwt_token(token: str) -> dict | None:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # Tokens issued before key ids were added carry none and use the current key
+        kid = jwt.get_unverified_header(token).get("kid", settings.JWT_KEY_ID)
+        secret = signing_keys().get(kid)
+        if secret is None:
+            raise jwt.InvalidTokenError(f"Unknown key id: {kid}")
+        payload = jwt.decode(
+            token, secret, algorithms=[settings.ALGORITHM], options={"require": ["exp"]}
+        )
         return payload
     except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Signature has expired")
+        raise HTTPException(status_code=401, detail="Signature has expired") from None
     except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        raise HTTPException(status_code=401, detail="Invalid token") from None
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
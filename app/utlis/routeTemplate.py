@@ -0,0 +1,16 @@
+from starlette.types import Scope
+
+
+def route_template(scope: Scope, default: str | None = None) -> str | None:
+    """
+    Path template of the route that handled the request, e.g. "/user/{user_id}".
+
+    Only known once routing has run. Routes of included routers are stored
+    relative to their prefix, so the full template is read from FastAPI's
+    effective route when there is one.
+    """
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    path = getattr(context, "path", None)
+    if path is None:
+        path = getattr(scope.get("route"), "path", None)
+    return default if path is None else path
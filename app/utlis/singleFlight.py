@@ -0,0 +1,145 @@
+import asyncio
+import functools
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import SINGLE_FLIGHT_EVENTS
+
+logger = get_logger(__name__)
+
+# Every SingleFlight registers itself here for single_flight_stats()
+_registry: dict[str, "SingleFlight"] = {}
+
+
+def _normalise(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def call_key(*args: Any, **kwargs: Any) -> str:
+    """
+    Key of a call from its arguments; keyword order and pydantic models
+    built from the same values do not matter.
+    """
+    return json.dumps([args, kwargs], sort_keys=True, default=_normalise)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls of one coroutine function.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task and get the same result or exception.
+    The task is shielded, so a leader whose request is cancelled does not
+    cancel it for the others. Each key's call gets a deadline of `timeout`
+    seconds (or the leader's own `timeout`) from when it started; followers
+    still waiting at the deadline, or arriving after it, make the call
+    themselves. Nothing is kept once the call finishes.
+    """
+
+    EVENTS = ("calls", "coalesced", "timeouts")
+
+    def __init__(self, name: str, timeout: float | None = None):
+        self.name = name
+        self.timeout = timeout
+        self._counts = dict.fromkeys(self.EVENTS, 0)
+        self._metrics = {
+            event: SINGLE_FLIGHT_EVENTS.labels(name, event) for event in self.EVENTS
+        }
+        # key -> (call, deadline on the loop clock or None)
+        self._inflight: dict[str, tuple[asyncio.Task, float | None]] = {}
+        _registry[name] = self
+
+    def _incr(self, event: str) -> None:
+        self._counts[event] += 1
+        self._metrics[event].inc()
+
+    async def run(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Any]],
+        timeout: float | None = None,
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        entry = self._inflight.get(key)
+        if entry is None:
+            self._incr("calls")
+            timeout = self.timeout if timeout is None else timeout
+            deadline = None if timeout is None else loop.time() + timeout
+            task = asyncio.ensure_future(call())
+            self._inflight[key] = (task, deadline)
+            task.add_done_callback(lambda done: self._discard(key, done))
+            return await asyncio.shield(task)
+
+        task, deadline = entry
+        self._incr("coalesced")
+        try:
+            remaining = None if deadline is None else max(deadline - loop.time(), 0)
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except TimeoutError:
+            # The leader is stuck, do not queue every request behind it
+            self._incr("timeouts")
+            logger.warning("Coalesced call timed out, calling directly", name=self.name)
+            return await call()
+
+    def _discard(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieved so an exception nobody awaits any more is not logged as lost
+            task.exception()
+
+    def forget(self, key: str | None = None) -> None:
+        """
+        Let the next call for `key` (every key by default) start a new call
+        instead of joining one that may have read data from before a write.
+        """
+        if key is None:
+            self._inflight.clear()
+        else:
+            self._inflight.pop(key, None)
+
+    def stats_dict(self) -> dict:
+        return self._counts | {"in_flight": len(self._inflight)}
+
+
+def single_flight(
+    name: str,
+    timeout: float | None = None,
+    key: Callable[..., str] = call_key,
+):
+    """
+    Decorator coalescing concurrent calls of a coroutine function that have
+    the same `key(*args, **kwargs)`. Only for loading data: every caller
+    gets the same result object and must not modify it, so build responses
+    outside the decorated function.
+
+    The SingleFlight is available as `function.flight`.
+    """
+
+    def decorator(function: Callable[..., Awaitable[Any]]):
+        default = settings.SINGLE_FLIGHT_TIMEOUT
+        flight = SingleFlight(name, default if timeout is None else timeout)
+
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            if not settings.SINGLE_FLIGHT_ENABLED:
+                return await function(*args, **kwargs)
+            return await flight.run(
+                key(*args, **kwargs), lambda: function(*args, **kwargs)
+            )
+
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
+
+
+def single_flight_stats() -> dict:
+    return {name: flight.stats_dict() for name, flight in _registry.items()}
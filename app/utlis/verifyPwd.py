@@ -1,4 +1,18 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_QUEUE_WAIT,
+    PASSWORD_HASH_REJECTED,
+    LatencyHistogram,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -8,8 +22,102 @@ def hash_password(password: str) -> str:
     password_bytes = password.encode("utf-8")
     
     # Generate salt and hash password
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed_password = bcrypt.hashpw(password_bytes, salt)
     
     # Convert hashed password to string before returning
     return hashed_password.decode("utf-8")
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    True when the stored hash was made with a different work factor than
+    BCRYPT_ROUNDS (hashes look like "$2b$12$<salt+digest>").
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+# ─── Worker pool ───
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop without the pickling overhead of a process pool.
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_counters = {"queued": 0, "running": 0, "completed": 0, "rejected": 0}
+queue_wait = LatencyHistogram()
+hash_time = LatencyHistogram()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="bcrypt",
+        )
+    return _executor
+
+
+def shutdown_hasher() -> None:
+    global _executor  # noqa: PLW0603
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def _timed(fn, enqueued_at: float, *args):
+    started = time.monotonic()
+    queue_wait.observe((started - enqueued_at) * 1000)
+    PASSWORD_HASH_QUEUE_WAIT.observe(started - enqueued_at)
+    with _lock:
+        _counters["queued"] -= 1
+        _counters["running"] += 1
+    try:
+        return fn(*args)
+    finally:
+        hash_time.observe((time.monotonic() - started) * 1000)
+        PASSWORD_HASH_DURATION.labels(fn.__name__).observe(time.monotonic() - started)
+        with _lock:
+            _counters["running"] -= 1
+            _counters["completed"] += 1
+
+
+async def _submit(fn, *args):
+    with _lock:
+        if _counters["queued"] >= settings.PASSWORD_HASH_MAX_QUEUE:
+            _counters["rejected"] += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=503, detail="Too many authentication requests, please retry"
+            )
+        _counters["queued"] += 1
+    future = _get_executor().submit(_timed, fn, time.monotonic(), *args)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # Client went away before a worker picked the job up
+        if future.cancel():
+            with _lock:
+                _counters["queued"] -= 1
+        raise
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _submit(verify_password, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _submit(hash_password, password)
+
+
+def hasher_stats() -> dict:
+    with _lock:
+        stats = dict(_counters)
+    stats["workers"] = settings.PASSWORD_HASH_WORKERS
+    stats["max_queue"] = settings.PASSWORD_HASH_MAX_QUEUE
+    stats["rounds"] = settings.BCRYPT_ROUNDS
+    stats["queue_wait_ms"] = queue_wait.snapshot()
+    stats["hash_ms"] = hash_time.snapshot()
+    return stats
@@ -0,0 +1,79 @@
+"""
+Concurrent /auth/login and /user/{user_id} throughput on a single worker.
+
+Run it once against a server started with DB_SYNC_FALLBACK=true (blocking
+psycopg2 pool, "before") and once with the default asyncio pool ("after")::
+
+    DB_SYNC_FALLBACK=true uv run uvicorn app.main:app --workers 1
+    uv run python -m benchmarks.bench_async_db --label before
+
+    uv run uvicorn app.main:app --workers 1
+    uv run python -m benchmarks.bench_async_db --label after
+"""
+
+import argparse
+import asyncio
+
+import httpx
+import jwt
+
+from benchmarks.common import print_result, run_load
+
+EMAIL = "bench.user@example.com"
+PASSWORD = "bench-password"
+
+
+async def ensure_user(client: httpx.AsyncClient) -> tuple[int, str]:
+    await client.post(
+        "/auth/signup",
+        json={
+            "email": EMAIL,
+            "password": PASSWORD,
+            "first_name": "Bench",
+            "last_name": "User",
+        },
+    )
+    response = await client.post(
+        "/auth/login", json={"email": EMAIL, "password": PASSWORD}
+    )
+    response.raise_for_status()
+    token = response.json()["data"]
+    return jwt.decode(token, options={"verify_signature": False})["userId"], token
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=30
+    ) as client:
+        user_id, token = await ensure_user(client)
+        auth = {"Authorization": f"Bearer {token}"}
+
+        async def login(c: httpx.AsyncClient) -> httpx.Response:
+            return await c.post(
+                "/auth/login", json={"email": EMAIL, "password": PASSWORD}
+            )
+
+        async def read_user(c: httpx.AsyncClient) -> httpx.Response:
+            return await c.get(f"/user/{user_id}", headers=auth)
+
+        async def mixed(c: httpx.AsyncClient) -> httpx.Response:
+            await login(c)
+            return await read_user(c)
+
+        for name, fn in (
+            ("login", login),
+            ("read_user", read_user),
+            ("login+read_user", mixed),
+        ):
+            result = await run_load(client, fn, args.concurrency, args.duration)
+            print_result(f"[{args.label}] {name}", result)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--label", default="run")
+    asyncio.run(main(parser.parse_args()))
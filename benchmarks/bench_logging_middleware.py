@@ -0,0 +1,135 @@
+"""
+Requests/sec and server peak RSS for large uploads with and without the
+logging middleware.
+
+Every variant serves the same echo-size endpoint from its own uvicorn
+process; "buffering" mirrors the previous BaseHTTPMiddleware implementation
+that read the whole body before calling the app. Both log through the app
+logger with records below WARNING dropped, so the numbers measure the
+middleware rather than log I/O::
+
+    uv run python -m benchmarks.bench_logging_middleware --size-kb 1024
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logging import setup_logging
+from app.middleware.logging_midleware import LoggingMiddleware, logger
+from benchmarks.common import print_result, run_load
+
+VARIANTS = ("none", "buffering", "asgi")
+
+
+def create_app():
+    setup_logging()
+    logging.disable(logging.INFO)
+
+    class BufferingLoggingMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start = time.time()
+            body = await request.body()
+            response = await call_next(request)
+            extra = {
+                "path": request.url.path,
+                "duration_ms": round((time.time() - start) * 1000, 2),
+            }
+            if response.status_code >= 400:
+                extra["request_body"] = body.decode(errors="ignore")
+            logger.info("HTTP request", extra=extra)
+            return response
+
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    variant = os.environ["BENCH_VARIANT"]
+    if variant == "buffering":
+        app.add_middleware(BufferingLoggingMiddleware)
+    elif variant == "asgi":
+        app.add_middleware(LoggingMiddleware)
+    return app
+
+
+async def measure(port: int, args: argparse.Namespace) -> dict:
+    payload = os.urandom(args.size_kb * 1024)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=30
+    ) as client:
+        for _ in range(100):
+            try:
+                await client.post("/upload", content=b"warmup")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+        return await run_load(
+            client,
+            lambda c: c.post("/upload", content=payload),
+            concurrency=args.concurrency,
+            duration=args.duration,
+        )
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    # Linux only; buffered uploads show up here rather than in requests/sec
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    for variant in VARIANTS:
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "benchmarks.bench_logging_middleware:create_app",
+                "--factory",
+                "--port",
+                str(args.port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            env={**os.environ, "BENCH_VARIANT": variant},
+        )
+        try:
+            result = asyncio.run(measure(args.port, args))
+            result["peak_rss_mb"] = peak_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+        print_result(f"{variant} ({args.size_kb} KB)", result)
+        print(json.dumps({"variant": variant, **result}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Per-query latency of the primary-key and email lookups with and without
+server-side prepared statements.
+
+Runs the same SQL text the services send against DATABASE_URL on a single
+connection, once with preparation disabled and once prepared on first use
+(DB_PREPARE_THRESHOLD=0)::
+
+    uv run python -m benchmarks.bench_prepared_statements --repeat 20000
+"""
+
+import argparse
+import random
+import time
+
+import psycopg
+
+from app.core.config import settings
+from app.db.query_builder import QueryBuilder
+from app.services.user_service import USER_COLUMNS
+from benchmarks.common import percentile
+
+# The exact text read_user and login send
+QUERIES = {
+    "user_id": QueryBuilder("users").select(*USER_COLUMNS).where(user_id=0).sql,
+    "email": QueryBuilder("users")
+    .select("user_id", "password", "first_name", "last_name")
+    .where(email="")
+    .sql,
+}
+MODES = {"unprepared": None, "prepared": 0}
+
+
+def sample_keys(size: int) -> dict[str, list]:
+    with psycopg.connect(settings.DATABASE_URL) as conn:
+        rows = conn.execute(
+            "SELECT user_id, email FROM users ORDER BY random() LIMIT %s", (size,)
+        ).fetchall()
+    if not rows:
+        raise SystemExit(
+            "users table is empty, seed it first (e.g. benchmarks.bench_user_search)"
+        )
+    return {"user_id": [row[0] for row in rows], "email": [row[1] for row in rows]}
+
+
+def time_lookups(conn, query: str, keys: list, repeat: int) -> list[float]:
+    latencies = []
+    with conn.cursor() as cursor:
+        for _ in range(repeat):
+            key = random.choice(keys)
+            start = time.perf_counter()
+            cursor.execute(query, {"p0": key})
+            cursor.fetchone()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument(
+        "--keys", type=int, default=1000, help="distinct users looked up"
+    )
+    args = parser.parse_args()
+
+    keys = sample_keys(args.keys)
+    for name, query in QUERIES.items():
+        for mode, threshold in MODES.items():
+            with psycopg.connect(
+                settings.DATABASE_URL, prepare_threshold=threshold, autocommit=True
+            ) as conn:
+                # Warm up caches and prepare
+                time_lookups(conn, query, keys[name], 100)
+                samples = time_lookups(conn, query, keys[name], args.repeat)
+            print(
+                f"{name:<8} {mode:<11} p50_ms={percentile(samples, 50):.3f} "
+                f"p99_ms={percentile(samples, 99):.3f} "
+                f"mean_ms={sum(samples) / len(samples):.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
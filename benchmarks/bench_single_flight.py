@@ -0,0 +1,113 @@
+"""
+Identical concurrent reads with and without request coalescing, served
+in-process over ASGI.
+
+Each wave sends `--concurrency` identical GET /user/{id} (or GET /user with
+`--list`) requests at once. Both cache tiers are off, so every read that is
+not coalesced runs its own query. Reports the queries executed per wave and
+the wave latency. Needs the database from .env::
+
+    uv run python -m benchmarks.bench_single_flight --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.db.query_builder import QueryBuilder
+from app.db.query_stats import query_stats
+from app.main import app
+from app.utlis.generateJwt import create_jwt_token
+from benchmarks.common import percentile
+
+
+async def measure(args: argparse.Namespace) -> dict:
+    latencies = []
+    async with app.router.lifespan_context(app):
+        if args.list:
+            url = "/user?limit=50"
+        else:
+            user = await QueryBuilder("users").select("user_id").limit(1).fetch_one()
+            url = f"/user/{user['user_id']}"
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {create_jwt_token({'userId': 0})}"}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=headers
+        ) as client:
+            await client.get(url)
+            query_stats.reset()
+            for _ in range(args.waves):
+                start = time.perf_counter()
+                responses = await asyncio.gather(
+                    *(client.get(url) for _ in range(args.concurrency))
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                for response in responses:
+                    response.raise_for_status()
+            queries = sum(
+                statement["calls"] for statement in query_stats.top(limit=1000)
+            )
+    return {
+        "queries_per_wave": round(queries / args.waves, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--waves", type=int, default=30)
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="coalesce GET /user instead of GET /user/{id}",
+    )
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    for enabled in ("false", "true"):
+        env = {
+            **os.environ,
+            "SINGLE_FLIGHT_ENABLED": enabled,
+            "CACHE_REDIS_ENABLED": "false",
+            "CACHE_L1_ENABLED": "false",
+            "DB_QUERY_STATS": "true",
+            "MIGRATION": "false",
+            "SAVE_LOG": "false",
+        }
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_single_flight",
+            "--child",
+            "--concurrency",
+            str(args.concurrency),
+            "--waves",
+            str(args.waves),
+        ]
+        if args.list:
+            command.append("--list")
+        output = subprocess.run(
+            command, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        label = "coalesced" if enabled == "true" else "direct"
+        print(
+            f"[{label:<9}] "
+            + "  ".join(f"{key}={value}" for key, value in result.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold-start cost: time to import app.main and to run the lifespan startup.
+
+Every sample is a fresh interpreter, so module caches and pools start cold.
+Cases run with and without migrations, plus an import with an unreachable
+database to check that importing the app does not need one. Needs the
+database and Redis from .env::
+
+    uv run python -m benchmarks.bench_startup --runs 10 --label after
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CASES = {
+    "startup": {"MIGRATION": "false"},
+    "startup+migration": {"MIGRATION": "true"},
+    "import, no database": {
+        "MIGRATION": "false",
+        "DATABASE_URL": "postgresql://bench@127.0.0.1:1/unreachable",
+    },
+}
+
+
+def measure(lifespan: bool) -> dict:
+    start = time.perf_counter()
+    try:
+        # Imported here: the import itself is what is being timed
+        from app.main import app  # noqa: PLC0415
+    except Exception as e:
+        return {"error": type(e).__name__}
+    result = {"import_ms": (time.perf_counter() - start) * 1000}
+    if lifespan:
+
+        async def run() -> float:
+            started = time.perf_counter()
+            async with app.router.lifespan_context(app):
+                return (time.perf_counter() - started) * 1000
+
+        result["lifespan_ms"] = asyncio.run(run())
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--label", default="run")
+    parser.add_argument(
+        "--child", choices=["import", "lifespan"], help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child == "lifespan")))
+        return
+
+    for name, overrides in CASES.items():
+        env = {**os.environ, **overrides, "SAVE_LOG": "false"}
+        child = "import" if "DATABASE_URL" in overrides else "lifespan"
+        samples = []
+        for _ in range(args.runs):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_startup", "--child", child],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=False,
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        errors = [sample["error"] for sample in samples if "error" in sample]
+        if errors:
+            print(f"[{args.label}] {name:<20} failed: {errors[0]}")
+            continue
+        columns = "  ".join(
+            f"{key}={statistics.median(sample[key] for sample in samples):.0f}"
+            for key in samples[0]
+        )
+        print(f"[{args.label}] {name:<20} {columns}")
+
+
+if __name__ == "__main__":
+    main()
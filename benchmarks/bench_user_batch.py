@@ -0,0 +1,117 @@
+"""
+Fetching 100 users: one GET /user/batch against 100 GET /user/{id}, served
+in-process over ASGI.
+
+The in-process cache tier is off so every request goes to Redis. "cold"
+rounds invalidate the users first, so each request also loads them from
+Postgres; "warm" rounds are served from Redis. Needs the database and Redis
+from .env and at least `--ids` users::
+
+    uv run python -m benchmarks.bench_user_batch --label after
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.db.query_builder import QueryBuilder
+from app.main import app
+from app.services.user_service import user_cache
+from app.utlis.generateJwt import create_jwt_token
+from benchmarks.common import percentile
+
+
+async def measure(args: argparse.Namespace) -> dict:
+    async def singles(client: httpx.AsyncClient, ids: list[int]) -> None:
+        for user_id in ids:
+            (await client.get(f"/user/{user_id}")).raise_for_status()
+
+    async def batch(client: httpx.AsyncClient, ids: list[int]) -> None:
+        (await client.get("/user/batch", params={"ids": ids})).raise_for_status()
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        rows = (
+            await QueryBuilder("users")
+            .select("user_id")
+            .order_by("user_id")
+            .limit(args.ids)
+            .fetch_all()
+        )
+        ids = [row["user_id"] for row in rows]
+        keys = [str(user_id) for user_id in ids]
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {create_jwt_token({'userId': 0})}"}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=headers
+        ) as client:
+            for name, fetch in (("singles", singles), ("batch", batch)):
+                for state in ("cold", "warm"):
+                    latencies = []
+                    for _ in range(args.rounds):
+                        if state == "cold":
+                            await user_cache.invalidate_many(keys)
+                        else:
+                            await fetch(client, ids)
+                        start = time.perf_counter()
+                        await fetch(client, ids)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    results[f"{name}_{state}"] = {
+                        "p50_ms": round(percentile(latencies, 50), 2),
+                        "p99_ms": round(percentile(latencies, 99), 2),
+                    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ids", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    env = {
+        **os.environ,
+        "CACHE_L1_ENABLED": "false",
+        "CACHE_WARMUP_SIZE": "0",
+        "MIGRATION": "false",
+        "SAVE_LOG": "false",
+        "USER_BATCH_MAX_IDS": str(max(args.ids, 100)),
+    }
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_user_batch",
+            "--child",
+            "--ids",
+            str(args.ids),
+            "--rounds",
+            str(args.rounds),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    results = json.loads(output.strip().splitlines()[-1])
+    for name, result in results.items():
+        print(
+            f"[{args.label}] {name:<13} "
+            + "  ".join(f"{key}={value}" for key, value in result.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Microbenchmark of GET /user/{user_id} for each cache tier layout.
+
+Each layout runs in its own process (settings are read at import) with the
+app served in-process over ASGI, so the numbers isolate the cache path from
+network and HTTP server overhead. Needs the database and Redis from .env::
+
+    uv run python -m benchmarks.bench_user_cache --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.main import app
+from app.utlis.generateJwt import create_jwt_token
+from benchmarks.common import percentile
+
+LAYOUTS = {
+    "l1-only": {"CACHE_L1_ENABLED": "true", "CACHE_REDIS_ENABLED": "false"},
+    "redis-only": {"CACHE_L1_ENABLED": "false", "CACHE_REDIS_ENABLED": "true"},
+    "l1+redis": {"CACHE_L1_ENABLED": "true", "CACHE_REDIS_ENABLED": "true"},
+}
+
+
+async def measure(args: argparse.Namespace) -> dict:
+    # Hot set: a handful of ids requested over and over
+    user_ids = list(range(1, args.hot_users + 1))
+    latencies = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {create_jwt_token({'userId': 0})}"}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=headers
+        ) as client:
+            for user_id in user_ids:
+                await client.get(f"/user/{user_id}")
+            for i in range(args.requests):
+                start = time.perf_counter()
+                await client.get(f"/user/{user_ids[i % len(user_ids)]}")
+                latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--hot-users", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    for name, overrides in LAYOUTS.items():
+        env = {**os.environ, **overrides, "MIGRATION": "false", "SAVE_LOG": "false"}
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_user_cache",
+                "--child",
+                "--requests",
+                str(args.requests),
+                "--hot-users",
+                str(args.hot_users),
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<12} "
+            + "  ".join(f"{key}={value}" for key, value in result.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Latency and allocations of GET /user?limit=1000, served in-process over ASGI.
+
+The list cache is switched off so every request decodes and serialises the
+full page. Peak traced memory per request is measured with tracemalloc on
+a separate pass so tracing does not skew the timings. Needs the database
+from .env and at least `--limit` users (e.g. seeded by
+benchmarks.bench_user_search)::
+
+    uv run python -m benchmarks.bench_user_list --label after
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+from app.main import app
+from app.utlis.generateJwt import create_jwt_token
+from benchmarks.common import percentile
+
+
+async def measure(args: argparse.Namespace) -> dict:
+    url = f"/user?limit={args.limit}"
+    latencies = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {create_jwt_token({'userId': 0})}"}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", headers=headers
+        ) as client:
+            for _ in range(20):
+                response = await client.get(url)
+                response.raise_for_status()
+            rows = len(response.json()["data"])
+
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                await client.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            peaks = 0
+            for _ in range(args.traced):
+                tracemalloc.start()
+                await client.get(url)
+                peaks += tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+    return {
+        "rows": rows,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "peak_kib": round(peaks / args.traced / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--traced", type=int, default=5, help="requests run under tracemalloc"
+    )
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    env = {
+        **os.environ,
+        "CACHE_REDIS_ENABLED": "false",
+        "MIGRATION": "false",
+        "SAVE_LOG": "false",
+    }
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_user_list",
+            "--child",
+            "--requests",
+            str(args.requests),
+            "--traced",
+            str(args.traced),
+            "--limit",
+            str(args.limit),
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    print(
+        f"[{args.label}] "
+        + "  ".join(f"{key}={value}" for key, value in result.items())
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Latency of the old unanchored LIKE search versus the full-text search path.
+
+Seeds synthetic users (emails end in @bench.invalid) into DATABASE_URL,
+then times the search query of both paths for a few terms::
+
+    uv run alembic upgrade head
+    uv run python -m benchmarks.bench_user_search --users 1000000
+    uv run python -m benchmarks.bench_user_search --cleanup
+"""
+
+import argparse
+import time
+
+import psycopg2
+
+from app.core.config import settings
+from app.services.user_service import search_tsquery
+from benchmarks.common import percentile
+
+BENCH_DOMAIN = "bench.invalid"
+TERMS = ("mar", "olivia", "smi", "ander", "zz")
+
+OLD_QUERY = (
+    "SELECT * FROM users WHERE first_name LIKE %s ORDER BY first_name ASC LIMIT 10"
+)
+NEW_QUERY = (
+    "SELECT * FROM users WHERE search_vector @@ to_tsquery('simple', %s) "
+    "ORDER BY ts_rank(search_vector, to_tsquery('simple', %s)) DESC, user_id ASC "
+    "LIMIT 10"
+)
+
+SEED_SQL = f"""
+INSERT INTO users (email, password, first_name, last_name, full_name)
+SELECT
+    'bench' || g || '@{BENCH_DOMAIN}',
+    'x',
+    f.name,
+    l.name,
+    f.name || ' ' || l.name
+FROM generate_series(%s, %s) AS g
+CROSS JOIN LATERAL (SELECT (ARRAY['Maria','Olivia','James','Marcus','Liam','Emma',
+    'Noah','Ava','Sophia','Mason','Isabella','Ethan','Mia','Lucas','Amelia',
+    'Oliver'])[1 + (g * 7) %% 16] AS name) f
+CROSS JOIN LATERAL (SELECT (ARRAY['Smith','Johnson','Williams','Brown','Jones',
+    'Garcia','Miller','Davis','Anderson','Taylor','Thomas','Moore','Martin',
+    'Jackson','Lee','Harris'])[1 + (g * 13) %% 16] || (g %% 1000) AS name) l
+ON CONFLICT (email) DO NOTHING
+"""
+
+
+def seed(conn, users: int, batch: int = 100_000) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM users WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",)
+        )
+        existing = cursor.fetchone()[0]
+        for start in range(existing + 1, users + 1, batch):
+            cursor.execute(SEED_SQL, (start, min(start + batch - 1, users)))
+            conn.commit()
+            print(f"seeded {min(start + batch - 1, users)}/{users}")
+        cursor.execute("ANALYZE users")
+        conn.commit()
+
+
+def time_query(conn, query: str, params: tuple, repeat: int) -> list[float]:
+    latencies = []
+    with conn.cursor() as cursor:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--cleanup", action="store_true", help="delete the seeded users and exit"
+    )
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    if args.cleanup:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM users WHERE email LIKE %s", (f"%@{BENCH_DOMAIN}",)
+            )
+        conn.commit()
+        return
+
+    seed(conn, args.users)
+    for term in TERMS:
+        old = time_query(conn, OLD_QUERY, (f"%{term}%",), args.repeat)
+        tsquery = search_tsquery(term)
+        new = time_query(conn, NEW_QUERY, (tsquery, tsquery), args.repeat)
+        for name, samples in (("like", old), ("fulltext", new)):
+            print(
+                f"{term:<8} {name:<9} p50_ms={percentile(samples, 50):.2f} "
+                f"p99_ms={percentile(samples, 99):.2f}"
+            )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Shared helpers for the HTTP load benchmarks.
+
+The benchmarks talk to an already running server, e.g.::
+
+    uv run uvicorn app.main:app --workers 1 --port 8000
+"""
+
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+RequestFn = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    request_fn: RequestFn,
+    concurrency: int,
+    duration: float,
+) -> dict:
+    """
+    Fire request_fn from `concurrency` workers for `duration` seconds.
+    """
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await request_fn(client)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+def print_result(name: str, result: dict) -> None:
+    columns = "  ".join(f"{key}={value}" for key, value in result.items())
+    print(f"{name:<32} {columns}")
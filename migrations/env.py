@@ -10,16 +10,17 @@ from app.db.models import Base
 # Load env variables
 load_dotenv()
 
-#Load DB URL
-DATABASE_URL = os.getenv("DATABASE_URL")
-
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+#Load DB URL, passed in by app.db.migration when run from the app
+DATABASE_URL = config.attributes.get("database_url") or os.getenv("DATABASE_URL")
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# Skipped when run from the app, which has its own logging set up.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 
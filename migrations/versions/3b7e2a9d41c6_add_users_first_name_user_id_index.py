@@ -0,0 +1,42 @@
+"""add users first_name user_id index
+
+Revision ID: 3b7e2a9d41c6
+Revises: f937cc135515
+Create Date: 2026-10-18 18:02:11.402145
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7e2a9d41c6"
+down_revision: str | Sequence[str] | None = "f937cc135515"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backs keyset pagination: ORDER BY first_name, user_id / WHERE (first_name, user_id) > (...)
+    # Built concurrently so large users tables stay writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_first_name_user_id",
+            "users",
+            ["first_name", "user_id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_first_name_user_id",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
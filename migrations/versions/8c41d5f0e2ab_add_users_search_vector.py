@@ -0,0 +1,58 @@
+"""add users search vector
+
+Revision ID: 8c41d5f0e2ab
+Revises: 3b7e2a9d41c6
+Create Date: 2026-10-18 18:10:42.118304
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8c41d5f0e2ab"
+down_revision: str | Sequence[str] | None = "3b7e2a9d41c6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Keep in sync with User.search_vector in app/db/models/user.py.
+# The email is indexed whole and split on "@" / "." so its parts match too.
+SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' "
+    "|| coalesce(full_name, '') || ' ' || email || ' ' || translate(email, '@.', '  '))"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored so index rechecks and ts_rank read the vector instead of rebuilding it per row.
+    # Adding a stored generated column rewrites the table once.
+    op.add_column(
+        "users",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True),
+    )
+    # Built concurrently so large users tables stay writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_search_vector",
+            "users",
+            ["search_vector"],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_search_vector",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("users", "search_vector")
@@ -0,0 +1,10 @@
+import os
+
+# Settings needs these to import; the unit tests never connect to them
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DATABASE_URL", "postgresql://test@127.0.0.1:1/test")
+os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+os.environ.setdefault("REDIS_PORT", "1")
+os.environ.setdefault("REDIS_DB", "0")
+os.environ.setdefault("MIGRATION", "False")
+os.environ.setdefault("SAVE_LOG", "False")
@@ -0,0 +1,62 @@
+import fakeredis
+import pytest
+
+from app.redis.access_tracker import AccessTracker
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.mark.anyio
+async def test_flush_adds_pending_counts(client):
+    tracker = AccessTracker(client, "hot")
+    await client.set("hot:decay", 1)
+    for member in ("1", "2", "1", "1"):
+        tracker.record(member)
+
+    await tracker.flush()
+    tracker.record("2")
+    await tracker.flush()
+
+    assert await client.zscore("hot", "1") == 3
+    assert await client.zscore("hot", "2") == 2
+    assert await tracker.top(1) == ["1"]
+    assert tracker.stats_dict() == {"pending": 0, "flushed": 3}
+
+
+@pytest.mark.anyio
+async def test_flush_trims_to_capacity(client):
+    tracker = AccessTracker(client, "hot", capacity=2)
+    await client.set("hot:decay", 1)
+    for member, count in (("1", 1), ("2", 3), ("3", 2)):
+        for _ in range(count):
+            tracker.record(member)
+
+    await tracker.flush()
+
+    assert await tracker.top(10) == ["2", "3"]
+
+
+@pytest.mark.anyio
+async def test_counts_are_halved_once_per_half_life(client):
+    tracker = AccessTracker(client, "hot", half_life=60)
+    for _ in range(4):
+        tracker.record("1")
+
+    await tracker.flush()
+    assert await client.zscore("hot", "1") == 2
+    assert 0 < await client.ttl("hot:decay") <= 60
+
+    # The marker is still set, so this flush does not halve again
+    tracker.record("1")
+    await tracker.flush()
+    assert await client.zscore("hot", "1") == 3
+
+
+def test_nothing_is_recorded_without_redis():
+    tracker = AccessTracker(None, "hot")
+    tracker.record("1")
+
+    assert tracker.stats_dict()["pending"] == 0
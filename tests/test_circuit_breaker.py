@@ -0,0 +1,60 @@
+import pytest
+import redis
+
+from app.redis.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    assert (breaker.trips, breaker.rejected) == (1, 1)
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_trial_call_after_reset_timeout():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    assert breaker.state == "half-open"
+    breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_error_reply_closes_the_trial():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    breaker.allow()
+    breaker.record_error(redis.ResponseError("WRONGTYPE"))
+
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_connection_error_keeps_the_circuit_open():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    breaker.record_error(redis.ConnectionError())
+
+    assert breaker.state == "open"
+
+
+def test_open_error_is_a_redis_error():
+    # Existing `except redis.RedisError` fallbacks must catch it
+    assert issubclass(CircuitOpenError, redis.RedisError)
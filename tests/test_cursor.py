@@ -0,0 +1,46 @@
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.user_service import _decode_cursor, _encode_cursor
+
+
+def test_cursor_round_trip():
+    row = SimpleNamespace(first_name="Zoë", user_id=42)
+
+    assert _decode_cursor(_encode_cursor("DESC", row)) == ("DESC", "Zoë", 42)
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = _encode_cursor("ASC", SimpleNamespace(first_name="a?b/c", user_id=1))
+
+    assert "=" not in cursor
+    assert set(cursor) <= set(
+        "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    )
+
+
+def encode(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        base64.urlsafe_b64encode(b"not json").decode(),
+        encode(["SIDEWAYS", "a", 1]),
+        encode(["ASC", 1, 1]),
+        encode(["ASC", "a", "1"]),
+        encode(["ASC", "a"]),
+        encode({"sort": "ASC"}),
+    ],
+)
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor)
+
+    assert error.value.status_code == 400
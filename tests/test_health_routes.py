@@ -0,0 +1,23 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.routes.health_routes import router
+
+app = FastAPI()
+app.include_router(router, prefix="/health")
+client = TestClient(app)
+
+
+def test_query_stats_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_QUERIES_ENABLED", False)
+
+    assert client.get("/health/queries").status_code == 404
+    assert client.delete("/health/queries").status_code == 404
+
+
+def test_query_stats_need_a_token(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_QUERIES_ENABLED", True)
+
+    assert client.get("/health/queries").status_code == 401
+    assert client.delete("/health/queries").status_code == 401
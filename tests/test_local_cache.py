@@ -0,0 +1,67 @@
+from app.redis.local_cache import MISSING, LocalCache
+
+
+def test_hit_until_ttl():
+    cache = LocalCache(ttl=60)
+    cache.set("user:1", {"user_id": 1})
+
+    assert cache.get("user:1") == {"user_id": 1}
+    assert cache.get("user:2") is MISSING
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_expired_entries_are_misses():
+    cache = LocalCache(ttl=0)
+    cache.set("user:1", {"user_id": 1})
+
+    assert cache.get("user:1") is MISSING
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = LocalCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats.evictions == 1
+
+
+def test_invalidate_drops_the_whole_group():
+    cache = LocalCache(ttl=60)
+    cache.set("page:1", [1], group="users")
+    cache.set("page:2", [2], group="users")
+    cache.set("user:1", {"user_id": 1})
+
+    cache.invalidate("users")
+
+    assert cache.get("page:1") is MISSING
+    assert cache.get("page:2") is MISSING
+    assert cache.get("user:1") == {"user_id": 1}
+
+
+def test_write_started_before_an_invalidation_is_dropped():
+    cache = LocalCache(ttl=60)
+    epoch = cache.epoch
+    # Another worker invalidates while this one loads from the next tier
+    cache.invalidate("user:1")
+    cache.set("user:1", {"user_id": 1, "stale": True}, epoch=epoch)
+
+    assert cache.get("user:1") is MISSING
+    cache.set("user:1", {"user_id": 1}, epoch=cache.epoch)
+    assert cache.get("user:1") == {"user_id": 1}
+
+
+def test_clear_moves_the_epoch():
+    cache = LocalCache(ttl=60)
+    cache.set("user:1", 1)
+    epoch = cache.epoch
+
+    cache.clear()
+
+    assert cache.epoch == epoch + 1
+    assert len(cache) == 0
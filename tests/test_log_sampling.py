@@ -0,0 +1,48 @@
+from app.middleware.log_sampling import AccessLogSampler
+
+
+def test_route_override_drops_fast_successes():
+    sampler = AccessLogSampler(route_rates={"/health": 0})
+
+    assert sampler.should_log("GET", "/health", "/health", 200, 1.0) is None
+    assert sampler.stats.sampled_out_2xx == 1
+
+
+def test_route_override_never_hides_errors():
+    sampler = AccessLogSampler(route_rates={"/health": 0})
+
+    assert sampler.should_log("GET", "/health", "/health", 503, 1.0) == 1.0
+    assert sampler.should_log("GET", "/health", "/health", 404, 1.0) == 1.0
+    assert sampler.stats.logged == 2
+
+
+def test_route_override_never_hides_slow_requests():
+    sampler = AccessLogSampler(route_rates={"/health": 0}, slow_ms=100)
+
+    assert sampler.should_log("GET", "/health", "/health", 200, 150.0) == 1.0
+    assert sampler.stats.slow == 1
+
+
+def test_override_matches_raw_path():
+    sampler = AccessLogSampler(success_rate=1.0, route_rates={"/user/5": 0})
+
+    assert sampler.should_log("GET", "/user/{user_id}", "/user/5", 200, 1.0) is None
+    assert sampler.should_log("GET", "/user/{user_id}", "/user/6", 200, 1.0) == 1.0
+
+
+def test_error_rate_applies_to_errors():
+    sampler = AccessLogSampler(success_rate=1.0, error_rate=0.0)
+
+    assert sampler.should_log("GET", "/user", "/user", 500, 1.0) is None
+    assert sampler.stats.sampled_out_5xx == 1
+
+
+def test_errors_are_rate_limited_per_route():
+    sampler = AccessLogSampler(error_burst=2, error_refill=0.0)
+
+    kept = [sampler.should_log("GET", "/user", "/user", 500, 1.0) for _ in range(5)]
+
+    assert kept == [1.0, 1.0, None, None, None]
+    assert sampler.stats.rate_limited == 3
+    # Another route has its own bucket
+    assert sampler.should_log("GET", "/auth", "/auth", 500, 1.0) == 1.0
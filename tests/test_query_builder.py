@@ -0,0 +1,116 @@
+import pytest
+
+from app.db.query_builder import QueryBuilder, Raw, _compile
+
+
+def test_select_compiles_named_params():
+    query = (
+        QueryBuilder("users")
+        .select("user_id", "email")
+        .where(email="a@example.com")
+        .where("user_id", "IN", [1, 2])
+        .order_by("user_id")
+        .limit(10)
+        .offset(20)
+    )
+
+    assert query.sql == (
+        'SELECT "user_id", "email" FROM "users" WHERE "email" = %(p0)s'
+        ' AND "user_id" = ANY(%(p1)s) ORDER BY "user_id" ASC'
+        " LIMIT %(p2)s OFFSET %(p3)s"
+    )
+    assert query.params == {"p0": "a@example.com", "p1": [1, 2], "p2": 10, "p3": 20}
+
+
+def test_raw_params_keep_their_position():
+    rank = Raw("ts_rank(search_vector, to_tsquery('simple', %s)) AS rank", "ann")
+    query = (
+        QueryBuilder("users")
+        .select("user_id", rank)
+        .join("teams", ("teams.id", "users.team_id"))
+        .where(Raw("users.email LIKE %s", "a%%"))
+        .order_by(Raw("rank"), descending=True)
+    )
+
+    assert query.sql == (
+        'SELECT "user_id",'
+        " ts_rank(search_vector, to_tsquery('simple', %(p0)s)) AS rank"
+        ' FROM "users" INNER JOIN "teams" ON "teams"."id" = "users"."team_id"'
+        " WHERE users.email LIKE %(p1)s ORDER BY rank DESC"
+    )
+    assert query.params == {"p0": "ann", "p1": "a%%"}
+
+
+def test_none_compiles_to_is_null():
+    query = QueryBuilder("users").where("deleted_at", None).where("email", "!=", None)
+
+    assert query.sql.endswith('WHERE "deleted_at" IS NULL AND "email" IS NOT NULL')
+    assert query.params == {}
+
+
+def test_is_with_a_value_compiles_to_distinct_from():
+    query = (
+        QueryBuilder("users")
+        .where("is_active", "IS", True)
+        .where("team_id", "is not", 3)
+    )
+
+    assert query.sql.endswith(
+        'WHERE "is_active" IS NOT DISTINCT FROM %(p0)s'
+        ' AND "team_id" IS DISTINCT FROM %(p1)s'
+    )
+    assert query.params == {"p0": True, "p1": 3}
+
+
+def test_writes_compile():
+    insert = (
+        QueryBuilder("users")
+        .insert_many(("email", "first_name"), [("a", "A"), ("b", "B")])
+        .on_conflict_do_nothing("email")
+        .returning("user_id")
+    )
+    update = QueryBuilder("users").update(first_name="A").where(user_id=1)
+    delete = QueryBuilder("users").delete().where(user_id=1)
+
+    assert insert.sql == (
+        'INSERT INTO "users" ("email", "first_name") VALUES (%(p0)s, %(p1)s),'
+        ' (%(p2)s, %(p3)s) ON CONFLICT ("email") DO NOTHING RETURNING "user_id"'
+    )
+    assert insert.params == {"p0": "a", "p1": "A", "p2": "b", "p3": "B"}
+    assert update.compile() == (
+        'UPDATE "users" SET "first_name" = %(p0)s WHERE "user_id" = %(p1)s',
+        {"p0": "A", "p1": 1},
+    )
+    assert delete.sql == 'DELETE FROM "users" WHERE "user_id" = %(p0)s'
+
+
+def test_same_shape_reuses_the_compiled_sql():
+    first = QueryBuilder("cache_test").select("a").where("b", "IN", [1, 2, 3])
+    second = QueryBuilder("cache_test").select("a").where("b", "IN", [4])
+    first.compile()
+    hits = _compile.cache_info().hits
+
+    assert second.sql == first.sql
+    assert second.params == {"p0": [4]}
+    assert _compile.cache_info().hits == hits + 1
+
+
+def test_builder_is_immutable():
+    base = QueryBuilder("users").select("user_id")
+    filtered = base.where(user_id=1)
+
+    assert base.sql == 'SELECT "user_id" FROM "users"'
+    assert filtered.sql == 'SELECT "user_id" FROM "users" WHERE "user_id" = %(p0)s'
+    with pytest.raises(AttributeError):
+        base.table = "other"
+
+
+def test_unsafe_queries_are_rejected():
+    with pytest.raises(ValueError, match="every row"):
+        QueryBuilder("users").delete().compile()
+    with pytest.raises(ValueError, match="every row"):
+        QueryBuilder("users").update(first_name="A").compile()
+    with pytest.raises(ValueError, match="at least one row"):
+        QueryBuilder("users").insert_many(("email",), []).compile()
+    with pytest.raises(ValueError, match="Unsupported operator"):
+        QueryBuilder("users").where("email", "~", "a")
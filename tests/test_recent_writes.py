@@ -0,0 +1,55 @@
+import fakeredis
+import pytest
+
+from app.db.replicas import RecentWrites
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_marked_keys_are_recent():
+    writes = RecentWrites(None, window=5.0)
+    await writes.mark("user:1", "users")
+
+    assert await writes.recent("user:1")
+    assert await writes.recent("users")
+    assert not await writes.recent("user:2")
+
+
+async def test_marks_expire_after_the_window():
+    writes = RecentWrites(None, window=0.0)
+    await writes.mark("user:1")
+
+    assert not await writes.recent("user:1")
+
+
+async def test_oldest_marks_are_dropped_past_max_entries():
+    writes = RecentWrites(None, max_entries=2)
+    await writes.mark("user:1", "user:2", "user:3")
+
+    assert not await writes.recent("user:1")
+    assert await writes.recent("user:3")
+
+
+async def test_disabled_never_sticks():
+    writes = RecentWrites(None, enabled=False)
+    await writes.mark("user:1")
+
+    assert not await writes.recent("user:1")
+
+
+async def test_any_of_several_keys_is_recent():
+    writes = RecentWrites(None, window=5.0)
+    await writes.mark("user:2")
+
+    assert await writes.recent("user:1", "user:2")
+    assert not await writes.recent("user:1", "user:3")
+    assert not await writes.recent()
+
+
+async def test_marks_are_shared_through_redis():
+    client = fakeredis.FakeAsyncRedis()
+    await RecentWrites(client, window=5.0).mark("user:2")
+    other_worker = RecentWrites(client, window=5.0)
+
+    assert await other_worker.recent("user:1", "user:2")
+    assert not await other_worker.recent("user:1")
@@ -0,0 +1,186 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.redis.cache import NEGATIVE_SENTINEL, RedisCache, purge_legacy_keys
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeAsyncRedis()
+
+
+def make_cache(client, **options) -> RedisCache:
+    return RedisCache(client, "test", 60, **options)
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+@pytest.mark.anyio
+async def test_miss_loads_once_then_hits(client):
+    cache = make_cache(client)
+    loader = Loader({"user_id": 1})
+
+    assert await cache.get_or_load("1", loader) == ({"user_id": 1}, False)
+    assert await cache.get_or_load("1", loader) == ({"user_id": 1}, True)
+    assert loader.calls == 1
+    assert await client.get("test:1:1:v0") is not None
+
+
+@pytest.mark.anyio
+async def test_invalidate_bumps_the_version(client):
+    cache = make_cache(client)
+    await cache.get_or_load("1", Loader("old"))
+
+    await cache.invalidate("1")
+
+    assert await client.get("test:ver:1") == b"1"
+    assert await cache.get_or_load("1", Loader("new")) == ("new", False)
+    assert await client.get("test:1:1:v1") is not None
+
+
+@pytest.mark.anyio
+async def test_slow_load_cannot_repopulate_after_invalidate(client):
+    cache = make_cache(client)
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_loader():
+        started.set()
+        await release.wait()
+        return "stale"
+
+    reader = asyncio.create_task(cache.get_or_load("1", slow_loader))
+    await started.wait()
+    await cache.invalidate("1")
+    release.set()
+    assert await reader == ("stale", False)
+
+    # The stale row went under the old version, which nobody reads any more
+    assert await client.get("test:1:1:v0") is not None
+    assert await cache.get_or_load("1", Loader("fresh")) == ("fresh", False)
+
+
+@pytest.mark.anyio
+async def test_missing_values_are_cached_negatively(client):
+    cache = make_cache(client)
+    loader = Loader(None)
+
+    assert await cache.get_or_load("404", loader) == (None, False)
+    assert await cache.get_or_load("404", loader) == (None, True)
+    assert loader.calls == 1
+    assert await client.get("test:1:404:v0") == NEGATIVE_SENTINEL
+    assert cache.stats.as_dict()["negative_hits"] == 1
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_share_one_load(client):
+    cache = make_cache(client)
+    calls = 0
+
+    async def slow_loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "value"
+
+    results = await asyncio.gather(
+        *(cache.get_or_load("1", slow_loader) for _ in range(5))
+    )
+
+    assert calls == 1
+    assert sorted(results) == [("value", False)] + [("value", True)] * 4
+    assert cache.stats.as_dict()["lock_waits"] == 4
+
+
+@pytest.mark.anyio
+async def test_follower_loads_itself_when_the_lock_holder_stalls(client):
+    cache = make_cache(client, lock_wait=0.05)
+    await client.set("test:1:1:v0:lock", "other-worker")
+    loader = Loader("value")
+
+    assert await cache.get_or_load("1", loader) == ("value", False)
+    assert loader.calls == 1
+    assert cache.stats.as_dict()["lock_waits"] == 1
+
+
+@pytest.mark.anyio
+async def test_redis_errors_fall_back_to_the_loader():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    cache = make_cache(fakeredis.FakeAsyncRedis(server=server))
+    loader = Loader("value")
+
+    assert await cache.get_or_load("1", loader) == ("value", False)
+    assert loader.calls == 1
+    assert cache.stats.as_dict()["errors"] == 1
+    # Invalidation errors are logged, not raised
+    await cache.invalidate("1")
+
+
+@pytest.mark.anyio
+async def test_legacy_keys_are_purged_once(client):
+    await client.set("user:7", b'{"password": "hash"}')
+    await client.set("user:2:7:v0", b"{}")
+    await client.set("user:ver:7", 1)
+    await client.set("user_list:2:abc:v0", b"[]")
+
+    assert await purge_legacy_keys(client, "user") == 1
+    assert await client.exists("user:7") == 0
+    assert await client.exists("user:2:7:v0", "user:ver:7", "user_list:2:abc:v0") == 3
+
+    await client.set("user:8", b"{}")
+    assert await purge_legacy_keys(client, "user") == 0
+
+
+@pytest.mark.anyio
+async def test_warm_loads_only_missing_entries(client):
+    cache = make_cache(client)
+    await cache.get_or_load("1", Loader("cached"))
+    calls = []
+
+    async def loader(keys):
+        calls.append(keys)
+        return {key: f"warm-{key}" for key in keys if key != "404"}
+
+    assert await cache.warm(["1", "2", "404"], loader) == 1
+    assert calls == [["2", "404"]]
+    assert await cache.get_or_load("1", Loader(None)) == ("cached", True)
+    assert await cache.get_or_load("2", Loader(None)) == ("warm-2", True)
+    assert await client.exists("test:1:warmup") == 0
+
+
+@pytest.mark.anyio
+async def test_warm_never_replaces_an_entry_stored_meanwhile(client):
+    cache = make_cache(client)
+
+    async def loader(keys):
+        # A request fills the entry while the warm-up is loading
+        await cache.get_or_load("1", Loader("request"))
+        return {"1": "warm"}
+
+    assert await cache.warm(["1"], loader) == 0
+    assert await cache.get_or_load("1", Loader(None)) == ("request", True)
+
+
+@pytest.mark.anyio
+async def test_warm_is_skipped_while_another_worker_holds_the_lock(client):
+    cache = make_cache(client)
+    await client.set("test:1:warmup", "other-worker")
+    calls = []
+
+    async def loader(keys):
+        calls.append(keys)
+        return {}
+
+    assert await cache.warm(["1"], loader) == 0
+    assert calls == []
+    assert await client.get("test:1:warmup") == b"other-worker"
@@ -0,0 +1,96 @@
+import time
+
+import fakeredis
+import pytest
+
+from app.core.security import RevocationList, TokenCache
+from app.utlis.bloomFilter import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"jti-{index}")
+
+    assert all(f"jti-{index}" in bloom for index in range(1000))
+    assert bloom.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"jti-{index}")
+
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+
+def test_token_cache_hits_until_expiry():
+    cache = TokenCache()
+    cache.set(b"live", {"exp": time.time() + 60})
+    cache.set(b"expired", {"exp": time.time() - 1})
+
+    assert cache.get(b"live") is not None
+    assert cache.get(b"expired") is None
+    assert cache.get(b"missing") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_token_cache_drops_least_recently_used():
+    cache = TokenCache(max_entries=2)
+    for key in (b"a", b"b"):
+        cache.set(key, {"exp": time.time() + 60})
+    cache.get(b"a")
+    cache.set(b"c", {"exp": time.time() + 60})
+
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") is not None
+
+
+class UnreachableRedis:
+    def __getattr__(self, name):
+        raise AssertionError(f"Redis should not be called: {name}")
+
+
+@pytest.mark.anyio
+async def test_unknown_tokens_are_not_checked_in_redis():
+    revocations = RevocationList(fakeredis.FakeAsyncRedis())
+    await revocations.sync()
+    revocations.client = UnreachableRedis()
+
+    assert not await revocations.is_revoked("never-revoked")
+    assert not await revocations.is_revoked(None)
+    assert revocations.redis_checks == 0
+
+
+@pytest.mark.anyio
+async def test_revocation_disabled_without_a_client():
+    revocations = RevocationList(None)
+
+    assert not await revocations.is_revoked("jti")
+    with pytest.raises(RuntimeError):
+        await revocations.revoke("jti", time.time() + 60)
+
+
+@pytest.mark.anyio
+async def test_revoked_tokens_are_refused_before_the_first_sync():
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeAsyncRedis(server=server)
+    await RevocationList(client).revoke("revoked", time.time() + 60)
+    revocations = RevocationList(client)
+
+    # Redis answers while the filter is still empty
+    assert await revocations.is_revoked("revoked")
+    assert not await revocations.is_revoked("other")
+    assert revocations.redis_checks == 2
+
+    # A failed first sync does not make the empty filter authoritative
+    server.connected = False
+    await revocations.sync()
+    assert await revocations.is_revoked("other")
+
+    server.connected = True
+    await revocations.sync()
+    assert await revocations.is_revoked("revoked")
+    assert not await revocations.is_revoked("other")
+    assert revocations.redis_checks == 4
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.utlis.singleFlight import SingleFlight, call_key, single_flight
+
+pytestmark = pytest.mark.anyio
+
+
+def counted(result="value", delay=0.05):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return call, calls
+
+
+async def test_concurrent_calls_share_one_call():
+    flight = SingleFlight("test_share", timeout=1)
+    call, calls = counted()
+
+    results = await asyncio.gather(*(flight.run("k", call) for _ in range(5)))
+
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.stats_dict() == {
+        "calls": 1,
+        "coalesced": 4,
+        "timeouts": 0,
+        "in_flight": 0,
+    }
+
+
+async def test_followers_get_the_leaders_exception():
+    flight = SingleFlight("test_error", timeout=1)
+    call, calls = counted(LookupError("missing"))
+
+    results = await asyncio.gather(
+        *(flight.run("k", call) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, LookupError) for result in results)
+    assert len(calls) == 1
+
+
+async def test_followers_stop_waiting_at_the_keys_deadline():
+    flight = SingleFlight("test_deadline", timeout=0.05)
+    slow, _ = counted("slow", delay=0.3)
+    fast, _ = counted("fast", delay=0)
+
+    leader = asyncio.ensure_future(flight.run("k", slow))
+    await asyncio.sleep(0.1)
+    # Arrives after the deadline, so it does not wait at all
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    assert await flight.run("k", fast) == "fast"
+    assert loop.time() - start < 0.05
+    assert await leader == "slow"
+    assert flight.stats_dict()["timeouts"] == 1
+
+
+async def test_leader_can_set_its_own_timeout():
+    flight = SingleFlight("test_override", timeout=10)
+    slow, _ = counted("slow", delay=0.3)
+    fast, _ = counted("fast", delay=0)
+
+    leader = asyncio.ensure_future(flight.run("k", slow, timeout=0.01))
+    await asyncio.sleep(0)
+    assert await flight.run("k", fast) == "fast"
+    assert await leader == "slow"
+
+
+async def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight("test_cancel", timeout=1)
+    call, calls = counted()
+
+    leader = asyncio.ensure_future(flight.run("k", call))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.run("k", call))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == "value"
+    assert len(calls) == 1
+
+
+async def test_forget_starts_a_new_call():
+    flight = SingleFlight("test_forget", timeout=1)
+    call, calls = counted()
+
+    first = asyncio.ensure_future(flight.run("k", call))
+    await asyncio.sleep(0)
+    flight.forget("k")
+    await asyncio.gather(first, flight.run("k", call))
+
+    assert len(calls) == 2
+
+
+async def test_decorator_can_be_switched_off(monkeypatch):
+    calls = []
+
+    @single_flight("test_switch", timeout=1)
+    async def load(user_id: int):
+        calls.append(user_id)
+        await asyncio.sleep(0.01)
+        return {"user_id": user_id}
+
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", True)
+    first = await asyncio.gather(load(1), load(1))
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", False)
+    await asyncio.gather(load(1), load(1))
+
+    assert first[0] is first[1]
+    assert calls == [1, 1, 1]
+
+
+def test_call_key_ignores_keyword_order():
+    assert call_key(1, a=1, b=2) == call_key(1, b=2, a=1)
+    assert call_key(1) != call_key("1", a=None)
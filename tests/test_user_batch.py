@@ -0,0 +1,90 @@
+import fakeredis
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.redis.cache import NEGATIVE_SENTINEL, RedisCache
+from app.redis.local_cache import LocalCache
+from app.routes.user_routes import router
+from app.services import user_service
+
+USERS = {str(user_id): {"user_id": user_id} for user_id in (1, 2, 3)}
+
+
+class BatchLoader:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, keys: list[str]) -> dict:
+        self.calls.append(keys)
+        return {key: USERS[key] for key in keys if key in USERS}
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.mark.anyio
+async def test_batch_mixes_local_redis_and_one_load(client):
+    cache = RedisCache(client, "batch", 60, local=LocalCache(ttl=60))
+    loader = BatchLoader()
+    # "1" in process, "2" only in Redis, "3" and "404" in neither
+    await cache.get_many_or_load(["2"], loader)
+    cache.local.clear()
+    cache.local.set("1", USERS["1"])
+    loader.calls.clear()
+
+    values = await cache.get_many_or_load(["3", "1", "404", "3", "2"], loader)
+
+    assert values == {"1": USERS["1"], "2": USERS["2"], "3": USERS["3"], "404": None}
+    assert loader.calls == [["3", "404"]]
+    assert await client.get("batch:1:404:v0") == NEGATIVE_SENTINEL
+    assert await client.get("batch:1:3:v0") == orjson.dumps(USERS["3"])
+
+
+@pytest.mark.anyio
+async def test_batch_is_served_from_cache_the_second_time(client):
+    cache = RedisCache(client, "batch", 60)
+    loader = BatchLoader()
+
+    await cache.get_many_or_load(["1", "404"], loader)
+    values = await cache.get_many_or_load(["404", "1"], loader)
+
+    assert values == {"1": USERS["1"], "404": None}
+    assert len(loader.calls) == 1
+
+
+@pytest.fixture
+def api(client, monkeypatch):
+    monkeypatch.setattr(user_service, "user_cache", RedisCache(client, "batch", 60))
+    monkeypatch.setattr(user_service, "_load_users_read_only", BatchLoader())
+    app = FastAPI()
+    app.include_router(router, prefix="/user")
+    return TestClient(app)
+
+
+def test_batch_keeps_request_order_and_lists_not_found(api):
+    response = api.get("/user/batch", params={"ids": [3, 404, 1, 3, 405, 404]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [user and user["user_id"] for user in body["data"]] == [
+        3,
+        None,
+        1,
+        3,
+        None,
+        None,
+    ]
+    assert body["not_found"] == [404, 405]
+
+
+def test_batch_rejects_too_many_ids(api, monkeypatch):
+    monkeypatch.setattr(settings, "USER_BATCH_MAX_IDS", 2)
+
+    response = api.get("/user/batch", params={"ids": [1, 2, 3]})
+
+    assert response.status_code == 400